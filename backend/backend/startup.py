@@ -0,0 +1,142 @@
+"""
+Startup profiling, enabled with DJANGO_STARTUP_PROFILE=1.
+
+``enable()`` is called first thing by manage.py, wsgi.py and asgi.py. When
+profiling is on, it times every module import (self and cumulative time) and
+each app's import, models and ready() phases, then writes a report to stderr
+once ``django.setup()`` returns:
+
+    DJANGO_STARTUP_PROFILE=1 python manage.py check
+    DJANGO_STARTUP_PROFILE=1 gunicorn backend.wsgi:application
+
+DJANGO_STARTUP_PROFILE_LIMIT sets how many of the slowest modules are listed
+(default: 25). With profiling off, ``enable()`` does nothing.
+"""
+import os
+import sys
+import threading
+import time
+
+STARTUP_PROFILE = os.getenv("DJANGO_STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+STARTUP_PROFILE_LIMIT = int(os.getenv("DJANGO_STARTUP_PROFILE_LIMIT", "25"))
+
+APP_PHASES = ("import", "models", "ready")
+
+
+class ImportTimer:
+    """A meta path finder that times the loaders of every module it finds."""
+
+    def __init__(self):
+        self.modules = []
+        self._local = threading.local()
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+        # Builtin and frozen importers are classes shared by every module they load
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            loader.exec_module = self._timed(name, loader.exec_module)
+        return spec
+
+    def _timed(self, name, exec_module):
+        def exec_module_timed(module):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.modules.append((name, elapsed - nested, elapsed))
+        return exec_module_timed
+
+
+class StartupProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = ImportTimer()
+        self.apps = {}
+
+    def install(self):
+        # Before importing Django, so its own imports are timed too
+        sys.meta_path.insert(0, self.imports)
+        import django
+        from django.apps import AppConfig
+
+        profile = self
+
+        create = AppConfig.create.__func__
+
+        def create_timed(cls, entry):
+            started = time.perf_counter()
+            app_config = create(cls, entry)
+            profile.record(app_config.label, "import", time.perf_counter() - started)
+            app_config.import_models = profile.timed(app_config.label, "models", app_config.import_models)
+            app_config.ready = profile.timed(app_config.label, "ready", app_config.ready)
+            return app_config
+        AppConfig.create = classmethod(create_timed)
+
+        setup = django.setup
+
+        def setup_timed(*args, **kwargs):
+            try:
+                return setup(*args, **kwargs)
+            finally:
+                sys.meta_path.remove(profile.imports)
+                AppConfig.create = classmethod(create)
+                django.setup = setup
+                profile.report()
+        django.setup = setup_timed
+
+    def timed(self, label, phase, method):
+        def timed_method(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(label, phase, time.perf_counter() - started)
+        return timed_method
+
+    def record(self, label, phase, elapsed):
+        self.apps.setdefault(label, dict.fromkeys(APP_PHASES, 0.0))[phase] += elapsed
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        total = time.perf_counter() - self.started
+        imported = sum(own for _, own, _ in self.imports.modules)
+
+        lines = [
+            f"Startup profile: {total * 1000:.1f}ms to django.setup(), "
+            f"{imported * 1000:.1f}ms importing {len(self.imports.modules)} modules",
+            "",
+            f"{'app':<30}{'import ms':>12}{'models ms':>12}{'ready ms':>12}",
+        ]
+        for label, phases in sorted(self.apps.items(), key=lambda item: -sum(item[1].values())):
+            lines.append(f"{label:<30}" + "".join(f"{phases[phase] * 1000:>12.1f}" for phase in APP_PHASES))
+
+        lines += ["", f"{'module':<50}{'self ms':>12}{'cumulative ms':>16}"]
+        slowest = sorted(self.imports.modules, key=lambda module: -module[1])[:STARTUP_PROFILE_LIMIT]
+        for name, own, cumulative in slowest:
+            lines.append(f"{name:<50}{own * 1000:>12.1f}{cumulative * 1000:>16.1f}")
+
+        file.write("\n".join(lines) + "\n")
+
+
+def enable():
+    """Start profiling this process' startup if DJANGO_STARTUP_PROFILE is set."""
+    if not STARTUP_PROFILE:
+        return None
+    profile = StartupProfile()
+    profile.install()
+    return profile
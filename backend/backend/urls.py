@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from projects.instrumentation import metrics_view
 from projects.views import home_view
 
 admin.site.site_header = 'Github Repo Tracker'
@@ -28,6 +29,7 @@ urlpatterns = [
     path('', home_view, name='home'),
     path('admin/', admin.site.urls),
     path('api/', include('projects.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve static files in development
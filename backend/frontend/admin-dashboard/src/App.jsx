@@ -1,23 +1,48 @@
 import React, { useEffect, useState } from 'react';
-import { fetchProjects } from './api';
+import { fetchProjects, fetchStats } from './api';
 import './responsive.css';
 
+const PAGE_SIZE = 10;
+const LIST_FIELDS = ['id', 'name', 'description', 'language', 'stars', 'created_at'];
+
 const App = () => {
   const [repositories, setRepositories] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [stats, setStats] = useState({ total_projects: 0, total_stars: 0, language_count: 0 });
   const [formData, setFormData] = useState({ owner: '', repo: '' });
   const [status, setStatus] = useState('');
   const [isLoading, setIsLoading] = useState(false);
 
   const loadProjects = async () => {
     try {
-      const data = await fetchProjects();
-      setRepositories(data.projects || data);
+      const data = await fetchProjects({ pageSize: PAGE_SIZE, fields: LIST_FIELDS });
+      setRepositories(data.results);
+      setNextPage(data.next);
+    } catch (error) {
+      console.error('Error loading projects:', error);
+    }
+  };
+
+  const loadMoreProjects = async () => {
+    try {
+      const data = await fetchProjects({ next: nextPage });
+      setRepositories((loaded) => [...loaded, ...data.results]);
+      setNextPage(data.next);
     } catch (error) {
       console.error('Error loading projects:', error);
     }
   };
 
+  const loadStats = async () => {
+    try {
+      setStats(await fetchStats());
+    } catch (error) {
+      console.error('Error loading stats:', error);
+    }
+  };
+
   useEffect(() => {
+    loadStats();
     loadProjects();
   }, []);
 
@@ -44,6 +69,7 @@ const App = () => {
       }
       if (response.ok) {
         setFormData({ owner: '', repo: '' });
+        loadStats();
         loadProjects();
       }
     } catch (error) {
@@ -53,9 +79,6 @@ const App = () => {
     }
   };
 
-  const totalStars = repositories.reduce((total, repo) => total + repo.stars, 0);
-  const uniqueLanguages = new Set(repositories.map(repo => repo.language)).size;
-
   return (
     <div className="dashboard">
       <div className="card">
@@ -86,15 +109,15 @@ const App = () => {
         <h3>Statistics</h3>
         <div className="stats">
           <div className="stat">
-            <span className="number">{repositories.length}</span>
+            <span className="number">{stats.total_projects.toLocaleString()}</span>
             <span className="label">Repositories</span>
           </div>
           <div className="stat">
-            <span className="number">{totalStars.toLocaleString()}</span>
+            <span className="number">{stats.total_stars.toLocaleString()}</span>
             <span className="label">Total Stars</span>
           </div>
           <div className="stat">
-            <span className="number">{uniqueLanguages}</span>
+            <span className="number">{stats.language_count}</span>
             <span className="label">Languages</span>
           </div>
         </div>
@@ -113,7 +136,7 @@ const App = () => {
               </tr>
             </thead>
             <tbody>
-              {repositories.slice(0, 10).map((repo) => (
+              {repositories.map((repo) => (
                 <tr key={repo.id}>
                   <td data-label="Repository">
                     <strong>{repo.name}</strong>
@@ -130,6 +153,11 @@ const App = () => {
             </tbody>
           </table>
         </div>
+        {nextPage && (
+          <button type="button" onClick={loadMoreProjects}>
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );
@@ -1,7 +1,18 @@
 export const API_BASE = "/api";
 
-export async function fetchProjects() {
-  const res = await fetch(`${API_BASE}/projects/`, {
+// Fetches one cursor page of projects. Pass the `next` URL from a previous
+// page to continue; the server orders by newest first.
+export async function fetchProjects({ next = null, pageSize = 50, fields = null } = {}) {
+  let url = next;
+  if (!url) {
+    const params = new URLSearchParams({ page_size: pageSize });
+    if (fields) {
+      params.set("fields", fields.join(","));
+    }
+    url = `${API_BASE}/projects/?${params}`;
+  }
+
+  const res = await fetch(url, {
     credentials: "include",
   });
   
@@ -11,3 +22,15 @@ export async function fetchProjects() {
   
   return await res.json();
 }
+
+export async function fetchStats() {
+  const res = await fetch(`${API_BASE}/projects/stats/`, {
+    credentials: "include",
+  });
+
+  if (!res.ok) {
+    throw new Error(`HTTP error! status: ${res.status}`);
+  }
+
+  return await res.json();
+}
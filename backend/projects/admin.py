@@ -1,12 +1,15 @@
 from django.contrib import admin
-from .models import Project
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.db import connections
+from .filters import search_projects
+from .models import Job, Project
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):    
-    list_display = ('name', 'description', 'language', 'stars', 'created_at')
+    list_display = ('name', 'description', 'language', 'stars', 'created_at', 'last_synced_at')
     list_filter = ('language', 'created_at')
     search_fields = ('name', 'description')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'last_synced_at')
     ordering = ('-stars', '-created_at')
     
     change_list_template = 'admin/projects/project/change_list.html'
@@ -16,7 +19,27 @@ class ProjectAdmin(admin.ModelAdmin):
         extra_context['title'] = 'GitHub Repository Dashboard'
         return super().changelist_view(request, extra_context)
     
+    def get_search_results(self, request, queryset, search_term):
+        # Use the indexed full-text search instead of icontains over every column
+        if not search_term:
+            return queryset, False
+        return search_projects(queryset, search_term), False
+
+    def get_ordering(self, request):
+        # The change list puts this ahead of the search's own order_by, so
+        # keep results ranked while searching (Postgres annotates search_rank)
+        if request.GET.get(SEARCH_VAR, '').strip() and connections[Project.objects.db].vendor == 'postgresql':
+            return ('-search_rank', '-created_at')
+        return super().get_ordering(request)
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related()
 
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'key', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('key',)
+    readonly_fields = ('created_at', 'updated_at', 'finished_at', 'locked_by', 'locked_at')
+    ordering = ('-created_at',)
@@ -1,44 +1,89 @@
+import contextvars
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from .models import Project
+from rest_framework.utils.encoders import JSONEncoder
+from . import github_client, github_graphql, jobs, ratelimit, webhooks
+from .github_client import github_error_message, rate_limited_message
+from .models import Job, Project
+from .filters import select_projects
+from .serializers import JobSerializer, ProjectBulkUpdateSerializer, ProjectSelectionSerializer
+from .services import (
+    delete_projects, project_fields_from_github, update_projects, upsert_key, upsert_project, upsert_projects,
+)
 
-# GitHub API conf
-GITHUB_API_BASE = "https://api.github.com/repos"
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# Bulk import conf
+BULK_IMPORT_MAX_REPOS = int(os.getenv("GITHUB_BULK_IMPORT_MAX_REPOS", "1000"))
+BULK_IMPORT_WORKERS = int(os.getenv("GITHUB_BULK_IMPORT_WORKERS", "8"))
+REPO_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$')
 
-def get_github_headers():
-    headers = {"Accept": "application/vnd.github+json"}
-    if GITHUB_TOKEN:
-        headers["Authorization"] = f"token {GITHUB_TOKEN}"
-    return headers
+def github_error_status(status_code):
+    return status_code if status_code in (403, 404) else 400
+
+def github_error_response(status_code, owner, repo):
+    return Response(
+        {"error": github_error_message(status_code, owner, repo)},
+        status=github_error_status(status_code)
+    )
+
+def rate_limited_response(exc):
+    return Response(
+        {"error": rate_limited_message(exc), "retry_after": exc.retry_after},
+        status=429,
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def _fetch_for_import(full_name):
+    owner, repo = full_name.split('/')
+    try:
+        response = github_client.fetch_repo(owner, repo)
+    except ratelimit.RateLimitExceeded as exc:
+        return full_name, None, rate_limited_message(exc)
+    except requests.RequestException:
+        return full_name, None, "Failed to connect to GitHub API"
+
+    if response.status_code != 200:
+        return full_name, None, github_error_message(response.status_code, owner, repo)
+    return full_name, response.json(), None
+
+def _fetch_many_for_import(full_names):
+    """(full_name, repo_data, error) per repo, batched through GraphQL."""
+    try:
+        fetched = github_graphql.fetch_repos(full_names)
+    except ratelimit.RateLimitExceeded as exc:
+        return [(full_name, None, rate_limited_message(exc)) for full_name in full_names]
+    except requests.RequestException:
+        return [(full_name, None, "Failed to connect to GitHub API") for full_name in full_names]
+
+    results = []
+    for full_name in full_names:
+        status_code, repo_data = fetched[full_name]
+        if status_code != 200:
+            owner, repo = full_name.split('/')
+            results.append((full_name, None, github_error_message(status_code, owner, repo)))
+        else:
+            results.append((full_name, repo_data, None))
+    return results
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def fetch_github_repo(request, owner, repo):
-    api_url = f"{GITHUB_API_BASE}/{owner}/{repo}"
-    
     try:
-        response = requests.get(api_url, headers=get_github_headers(), timeout=10)
+        response = github_client.fetch_repo(owner, repo)
         
-        if response.status_code == 404:
-            return Response(
-                {"error": f"Repository '{owner}/{repo}' not found. It may be private, deleted, or doesn't exist."},
-                status=404
-            )
-        elif response.status_code == 403:
-            return Response(
-                {"error": f"Access denied to '{owner}/{repo}'. This repository may be private or you've hit the rate limit."},
-                status=403
-            )
-        elif response.status_code != 200:
-            return Response(
-                {"error": f"GitHub API returned status {response.status_code}"},
-                status=400
-            )
+        if response.status_code != 200:
+            return github_error_response(response.status_code, owner, repo)
         
         repo_data = response.json()
         return Response({
@@ -48,6 +93,8 @@ def fetch_github_repo(request, owner, repo):
             "stars": repo_data.get("stargazers_count", 0),
         })
         
+    except ratelimit.RateLimitExceeded as exc:
+        return rate_limited_response(exc)
     except requests.RequestException as e:
         return Response(
             {"error": "Failed to connect to GitHub API"},
@@ -57,37 +104,15 @@ def fetch_github_repo(request, owner, repo):
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def save_github_repo(request, owner, repo):
-    api_url = f"{GITHUB_API_BASE}/{owner}/{repo}"
-    
     try:
-        response = requests.get(api_url, headers=get_github_headers(), timeout=10)
+        response = github_client.fetch_repo(owner, repo)
         
-        if response.status_code == 404:
-            return Response(
-                {"error": f"Repository '{owner}/{repo}' not found. It may be private, deleted, or doesn't exist."},
-                status=404
-            )
-        elif response.status_code == 403:
-            return Response(
-                {"error": f"Access denied to '{owner}/{repo}'. This repository may be private or you've hit the rate limit."},
-                status=403
-            )
-        elif response.status_code != 200:
-            return Response(
-                {"error": f"GitHub API returned status {response.status_code}"},
-                status=400
-            )
+        if response.status_code != 200:
+            return github_error_response(response.status_code, owner, repo)
         
         repo_data = response.json()
         
-        project, is_new = Project.objects.update_or_create(
-            name=repo_data['name'],
-            defaults={
-                'description': repo_data.get('description', ''),
-                'language': repo_data.get('language', ''),
-                'stars': repo_data.get('stargazers_count', 0),
-            }
-        )
+        project, is_new = upsert_project(project_fields_from_github(repo_data))
         
         action = "imported" if is_new else "updated"
         return Response({
@@ -102,6 +127,8 @@ def save_github_repo(request, owner, repo):
             }
         })
         
+    except ratelimit.RateLimitExceeded as exc:
+        return rate_limited_response(exc)
     except requests.RequestException:
         return Response(
             {"error": "Failed to connect to GitHub API"},
@@ -113,6 +140,151 @@ def save_github_repo(request, owner, repo):
             status=500
         )
 
+# Queued variants: the request only records a job, run_worker talks to GitHub
+
+def job_location(job):
+    return reverse('job-status', args=[job.id])
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def queue_github_repo(request, owner, repo):
+    full_name = f"{owner}/{repo}"
+    if not REPO_PATTERN.match(full_name):
+        return Response({"error": "Invalid repository identifier"}, status=400)
+
+    job, created = jobs.enqueue_repo(full_name)
+    message = f"Repository '{full_name}' queued for import" if created else f"Repository '{full_name}' is already queued"
+    return Response(
+        {"message": message, "job": JobSerializer(job).data},
+        status=202,
+        headers={"Location": job_location(job)}
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_status(request, job_id):
+    try:
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response({"error": "Job not found"}, status=404)
+    return Response(JobSerializer(job).data)
+
+async def _is_admin_user(request):
+    user = await request.auser()
+    return user.is_authenticated and user.is_staff
+
+def _permission_denied():
+    return JsonResponse(
+        {"detail": "You do not have permission to perform this action."},
+        status=403
+    )
+
+def _rate_limited(exc):
+    response = JsonResponse(
+        {"error": rate_limited_message(exc), "retry_after": exc.retry_after},
+        status=429
+    )
+    response["Retry-After"] = str(exc.retry_after)
+    return response
+
+# Async variants of the GitHub views for ASGI deployments. DRF's @api_view is
+# sync-only, so these are plain Django async views with the same contract.
+
+@require_GET
+async def fetch_github_repo_async(request, owner, repo):
+    if not await _is_admin_user(request):
+        return _permission_denied()
+
+    try:
+        response = await github_client.afetch_repo(owner, repo)
+    except ratelimit.RateLimitExceeded as exc:
+        return _rate_limited(exc)
+    except httpx.HTTPError:
+        return JsonResponse({"error": "Failed to connect to GitHub API"}, status=500)
+
+    if response.status_code != 200:
+        return JsonResponse(
+            {"error": github_error_message(response.status_code, owner, repo)},
+            status=github_error_status(response.status_code)
+        )
+
+    repo_data = response.json()
+    return JsonResponse({
+        "name": repo_data.get("name"),
+        "description": repo_data.get("description", ""),
+        "language": repo_data.get("language"),
+        "stars": repo_data.get("stargazers_count", 0),
+    })
+
+@require_POST
+async def save_github_repo_async(request, owner, repo):
+    if not await _is_admin_user(request):
+        return _permission_denied()
+
+    try:
+        response = await github_client.afetch_repo(owner, repo)
+    except ratelimit.RateLimitExceeded as exc:
+        return _rate_limited(exc)
+    except httpx.HTTPError:
+        return JsonResponse({"error": "Failed to connect to GitHub API"}, status=500)
+
+    if response.status_code != 200:
+        return JsonResponse(
+            {"error": github_error_message(response.status_code, owner, repo)},
+            status=github_error_status(response.status_code)
+        )
+
+    try:
+        project, is_new = await sync_to_async(upsert_project)(
+            project_fields_from_github(response.json())
+        )
+    except Exception:
+        return JsonResponse(
+            {"error": "An error occurred while saving the repository"},
+            status=500
+        )
+
+    action = "imported" if is_new else "updated"
+    # DRF's encoder, so created_at keeps microseconds and a Z like the sync view
+    return JsonResponse({
+        "message": f"Repository '{project.name}' {action} successfully",
+        "project": {
+            "id": project.id,
+            "name": project.name,
+            "description": project.description,
+            "language": project.language,
+            "stars": project.stars,
+            "created_at": project.created_at
+        }
+    }, encoder=JSONEncoder)
+
+# GitHub authenticates webhook deliveries with an HMAC signature rather than a
+# session, so this is a plain Django view exempt from CSRF.
+
+@csrf_exempt
+@require_POST
+def github_webhook(request):
+    if not webhooks.verify_signature(request.body, request.headers.get("X-Hub-Signature-256")):
+        return JsonResponse({"error": "Invalid signature"}, status=403)
+
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return JsonResponse({"message": "pong"})
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON payload"}, status=400)
+
+    if not webhooks.handle_event(event, payload):
+        return JsonResponse({"message": f"Event '{event}' ignored"})
+    return JsonResponse({"message": "Update queued"}, status=202)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def github_pool_stats(request):
+    return Response({**github_client.pool_stats(), "rate_limit": github_client.rate_limit_status()})
+
 @api_view(['DELETE'])
 @permission_classes([IsAdminUser])
 def delete_project(request, project_id):
@@ -134,4 +306,105 @@ def delete_project(request, project_id):
         return Response(
             {"error": "An error occurred while deleting the project"},
             status=500
-        )
\ No newline at end of file
+        )
+
+def _selected_projects(data):
+    return select_projects(Project.objects.all(), data.get('ids'), data.get('filter'))
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_delete_projects(request):
+    serializer = ProjectSelectionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    deleted, snapshots = delete_projects(_selected_projects(serializer.validated_data))
+    return Response({"deleted": deleted, "star_snapshots_deleted": snapshots})
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_update_projects(request):
+    serializer = ProjectBulkUpdateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    updated = update_projects(_selected_projects(serializer.validated_data), serializer.validated_data['values'])
+    return Response({"updated": updated})
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_import_github_repos(request):
+    repos = request.data.get('repos')
+
+    if not isinstance(repos, list) or not repos:
+        return Response(
+            {"error": "Expected a non-empty 'repos' list of 'owner/repo' strings"},
+            status=400
+        )
+    if len(repos) > BULK_IMPORT_MAX_REPOS:
+        return Response(
+            {"error": f"At most {BULK_IMPORT_MAX_REPOS} repositories can be imported per request"},
+            status=400
+        )
+
+    invalid = [r for r in repos if not isinstance(r, str) or not REPO_PATTERN.match(r)]
+    if invalid:
+        return Response(
+            {"error": "Invalid repository identifiers", "invalid": invalid},
+            status=400
+        )
+
+    # Preserve request order but fetch each repository only once
+    unique_repos = list(dict.fromkeys(repos))
+
+    if request.data.get('queue'):
+        queued = jobs.enqueue_repos(unique_repos)
+        return Response({
+            "queued": sum(1 for _, created in queued.values() if created),
+            "jobs": [
+                {"repo": full_name, "job_id": job.id, "status": job.status, "url": job_location(job)}
+                for full_name, (job, _) in queued.items()
+            ],
+        }, status=202)
+
+    if github_graphql.use_graphql():
+        fetched = _fetch_many_for_import(unique_repos)
+    else:
+        with ThreadPoolExecutor(max_workers=min(BULK_IMPORT_WORKERS, len(unique_repos))) as executor:
+            # Each task runs in a copy of this context so its GitHub calls
+            # are counted against the current request
+            futures = [
+                executor.submit(contextvars.copy_context().run, _fetch_for_import, full_name)
+                for full_name in unique_repos
+            ]
+            fetched = [future.result() for future in futures]
+
+    outcomes = {}
+    records = []
+    for full_name, repo_data, error in fetched:
+        if error:
+            outcomes[full_name] = {"repo": full_name, "status": "failed", "error": error}
+        else:
+            records.append((full_name, project_fields_from_github(repo_data)))
+
+    try:
+        saved = upsert_projects([record for _, record in records])
+    except Exception:
+        return Response(
+            {"error": "An error occurred while saving the repositories"},
+            status=500
+        )
+
+    for full_name, record in records:
+        project, is_new = saved[upsert_key(record)]
+        outcomes[full_name] = {
+            "repo": full_name,
+            "status": "imported" if is_new else "updated",
+            "project_id": project.id,
+        }
+
+    results = [outcomes[full_name] for full_name in unique_repos]
+    return Response({
+        "imported": sum(1 for r in results if r["status"] == "imported"),
+        "updated": sum(1 for r in results if r["status"] == "updated"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "results": results,
+    })
@@ -1,14 +1,10 @@
 from django.apps import AppConfig
-from django.db.utils import OperationalError
 
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects'
     
     def ready(self):
-        try:
-            from django.contrib.auth.models import User
-            if not User.objects.filter(username='admin').exists():
-                User.objects.create_superuser('admin', 'admin@demo.com', 'admin123')
-        except (OperationalError, Exception):
-            pass
+        # No queries here: ready() runs in every process and command, often
+        # before the database is reachable. See the create_admin command.
+        from . import signals  # noqa: F401
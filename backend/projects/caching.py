@@ -0,0 +1,115 @@
+"""
+Cache invalidation for data derived from the Project table.
+
+Cached views of the table embed generation numbers in their keys. A write
+bumps the relevant generation, which orphans every older entry at once; the
+orphans simply age out of the cache.
+
+* The table generation covers anything that spans many rows (lists, stats)
+  and changes on every write.
+* Each project also has its own version, so saving one project only
+  invalidates that project's detail responses. Writes that do not know which
+  rows they touched (bulk operations) bump the bulk generation instead,
+  which every detail key also embeds.
+"""
+import hashlib
+import json
+import os
+import time
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+GENERATION_KEY = 'projects:generation'
+BULK_GENERATION_KEY = 'projects:bulk-generation'
+RESPONSE_CACHE_TTL = int(os.getenv("PROJECT_RESPONSE_CACHE_TTL", "300"))
+
+
+def _object_version_key(pk):
+    return f'projects:version:{pk}'
+
+
+def _read_counter(key):
+    value = cache.get(key)
+    if value is None:
+        # Seed from the clock so an evicted counter never revives old entries
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def _bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def projects_generation():
+    return _read_counter(GENERATION_KEY)
+
+
+def invalidate_project_caches(pk=None):
+    """
+    Mark cached Project data stale.
+
+    Pass ``pk`` when a single known row changed; without it every cached
+    detail response is invalidated as well.
+    """
+    _bump_counter(GENERATION_KEY)
+    if pk is None:
+        _bump_counter(BULK_GENERATION_KEY)
+    else:
+        _bump_counter(_object_version_key(pk))
+
+
+def _request_fingerprint(request):
+    user_id = request.user.pk if request.user.is_authenticated else 'anon'
+    params = sorted(request.query_params.lists())
+    raw = json.dumps([user_id, request.get_host(), request.path, params])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def list_cache_key(request):
+    return f'projects:list:{projects_generation()}:{_request_fingerprint(request)}'
+
+
+def detail_cache_key(request, pk):
+    bulk_generation = _read_counter(BULK_GENERATION_KEY)
+    version = _read_counter(_object_version_key(pk))
+    return f'projects:detail:{bulk_generation}:{version}:{pk}:{_request_fingerprint(request)}'
+
+
+def cached_response(request, key, build_response):
+    """
+    Serve a GET from the response cache, building and storing it on a miss.
+
+    Responses carry an ETag and Last-Modified so clients can revalidate and
+    receive a 304 while the cached entry is still current.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        response = build_response()
+        if response.status_code != 200:
+            return response
+        payload = json.dumps(response.data, sort_keys=True, default=str)
+        entry = {
+            'data': response.data,
+            'etag': f'"{hashlib.md5(payload.encode()).hexdigest()}"',
+            'last_modified': int(time.time()),
+        }
+        cache.set(key, entry, RESPONSE_CACHE_TTL)
+
+    headers = {
+        'ETag': entry['etag'],
+        'Last-Modified': http_date(entry['last_modified']),
+        'Cache-Control': 'private, no-cache',
+    }
+    response = Response(entry['data'], headers=headers)
+    return get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response,
+    )
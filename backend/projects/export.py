@@ -0,0 +1,36 @@
+import os
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAdminUser
+from .filters import filter_projects
+from .models import Project
+from .renderers import CSVRenderer, NDJSONRenderer
+
+EXPORT_FIELDS = (
+    'id', 'name', 'owner', 'full_name', 'description', 'language', 'stars',
+    'created_at', 'last_synced_at',
+)
+EXPORT_CHUNK_SIZE = int(os.getenv("PROJECT_EXPORT_CHUNK_SIZE", "2000"))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+@renderer_classes([CSVRenderer, NDJSONRenderer])
+def export_projects(request):
+    """
+    Stream the whole catalogue as CSV or NDJSON (``?format=csv|ndjson``).
+
+    Rows are read as tuples through a chunked iterator (a server-side cursor
+    on Postgres), so memory stays flat however many projects there are. The
+    list endpoint's filters apply.
+    """
+    queryset = filter_projects(Project.objects.order_by('id'), request.query_params)
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    renderer = request.accepted_renderer
+    response = StreamingHttpResponse(
+        renderer.stream(EXPORT_FIELDS, rows),
+        content_type=f'{renderer.media_type}; charset={renderer.charset}',
+    )
+    response['Content-Disposition'] = f'attachment; filename="projects.{renderer.format}"'
+    return response
@@ -0,0 +1,154 @@
+"""
+A local stand-in for the GitHub API, used by the benchmark command.
+
+Serves GET /repos/{owner}/{repo} (with ETag revalidation) and POST /graphql
+from deterministic fake data, with a configurable delay per request and an
+optional rate limit that behaves like GitHub's: X-RateLimit-* headers on
+every response and 403s with no budget left once it is spent.
+Repositories whose name starts with ``missing`` do not exist.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LANGUAGES = ('Python', 'JavaScript', 'Go', 'Rust', 'TypeScript', 'Java', None)
+
+
+def fake_repo(owner, name):
+    """The REST payload of owner/name, stable across runs."""
+    digest = int(hashlib.md5(f'{owner}/{name}'.encode()).hexdigest(), 16)
+    return {
+        'name': name,
+        'full_name': f'{owner}/{name}',
+        'owner': {'login': owner},
+        'description': f'Benchmark fixture {name}',
+        'language': LANGUAGES[digest % len(LANGUAGES)],
+        'stargazers_count': digest % 100000,
+    }
+
+
+class FakeGitHub:
+    def __init__(self, latency=0.0, rate_limit=None, window=3600):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        server = self
+
+        class Handler(FakeGitHubHandler):
+            github = server
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.reset_at = int(time.time()) + self.window
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def take(self):
+        """Count one request; returns the budget left, or None if unlimited."""
+        with self._lock:
+            self.requests += 1
+            if time.time() >= self.reset_at:
+                self.reset_at = int(time.time()) + self.window
+                self.requests = 1
+            if self.rate_limit is None:
+                return None
+            return self.rate_limit - self.requests
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    github = None
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if not self.admit():
+            return
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if len(parts) != 3 or parts[0] != 'repos':
+            return self.send_json(404, {'message': 'Not Found'})
+        owner, name = parts[1], parts[2]
+        if name.startswith('missing'):
+            return self.send_json(404, {'message': 'Not Found'})
+
+        payload = fake_repo(owner, name)
+        etag = '"%s"' % hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self.send_json(304, None, {'ETag': etag})
+        self.send_json(200, payload, {'ETag': etag})
+
+    def do_POST(self):
+        if not self.admit('graphql'):
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        variables = json.loads(self.rfile.read(length)).get('variables') or {}
+
+        data, errors = {}, []
+        i = 0
+        while f'o{i}' in variables:
+            owner, name = variables[f'o{i}'], variables[f'n{i}']
+            if name.startswith('missing'):
+                data[f'r{i}'] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [f'r{i}'], 'message': 'Could not resolve to a Repository'})
+            else:
+                repo = fake_repo(owner, name)
+                data[f'r{i}'] = {
+                    'name': name,
+                    'nameWithOwner': repo['full_name'],
+                    'owner': {'login': owner},
+                    'description': repo['description'],
+                    'primaryLanguage': {'name': repo['language']} if repo['language'] else None,
+                    'stargazerCount': repo['stargazers_count'],
+                }
+            i += 1
+
+        body = {'data': data}
+        if errors:
+            body['errors'] = errors
+        self.send_json(200, body, resource='graphql')
+
+    def admit(self, resource='core'):
+        if self.github.latency:
+            time.sleep(self.github.latency)
+        self.remaining = self.github.take()
+        if self.remaining is not None and self.remaining < 0:
+            self.remaining = 0
+            self.send_json(403, {'message': 'API rate limit exceeded'}, resource=resource)
+            return False
+        return True
+
+    def send_json(self, status, payload, headers=None, resource='core'):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Resource', resource)
+        if self.remaining is not None:
+            self.send_header('X-RateLimit-Limit', str(self.github.rate_limit))
+            self.send_header('X-RateLimit-Remaining', str(self.remaining))
+            self.send_header('X-RateLimit-Reset', str(self.github.reset_at))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
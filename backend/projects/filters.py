@@ -0,0 +1,102 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from rest_framework.exceptions import ValidationError
+
+LANGUAGE_MATCH_MODES = ('iexact', 'exact', 'contains')
+
+
+def split_param(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def filter_by_language(queryset, language, match='iexact'):
+    """
+    Filter on one or more comma-separated languages.
+
+    ``iexact`` (the default) compares ``LOWER(language)`` so it is served by
+    the functional index, ``exact`` uses the plain column index, and
+    ``contains`` is an opt-in substring match backed by the trigram index
+    on Postgres.
+    """
+    languages = split_param(language)
+    if not languages:
+        return queryset
+
+    if match == 'exact':
+        return queryset.filter(language__in=languages)
+    if match == 'contains':
+        condition = Q()
+        for value in languages:
+            condition |= Q(language__icontains=value)
+        return queryset.filter(condition)
+    return queryset.alias(language_lower=Lower('language')).filter(
+        language_lower__in=[value.lower() for value in languages]
+    )
+
+
+def search_projects(queryset, query):
+    """
+    Full-text search over name and description, best matches first.
+
+    Postgres uses the trigger-maintained ``search_vector`` and its GIN index;
+    other databases (SQLite in development/tests) fall back to substring
+    matching.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+
+    search_query = SearchQuery(query, search_type='websearch', config='english')
+    return (
+        queryset
+        .filter(search_vector=search_query)
+        .annotate(search_rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-search_rank', '-created_at', '-id')
+    )
+
+
+def filter_projects(queryset, params):
+    """Apply the project list's query-string filters to ``queryset``."""
+    match = params.get('language_match', 'iexact')
+    if match not in LANGUAGE_MATCH_MODES:
+        raise ValidationError({'language_match': f"Must be one of: {', '.join(LANGUAGE_MATCH_MODES)}"})
+
+    language = params.get('language')
+    if language:
+        queryset = filter_by_language(queryset, language, match)
+
+    search = params.get('search')
+    if search:
+        queryset = search_projects(queryset, search)
+
+    return queryset
+
+
+def select_projects(queryset, ids=None, criteria=None):
+    """
+    Narrow ``queryset`` to the targets of a bulk operation.
+
+    ``ids`` and the validated ``criteria`` of a ProjectFilterSerializer are
+    combined with AND. Everything stays in the WHERE clause, so the result
+    can be deleted or updated with a single statement.
+    """
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+
+    criteria = criteria or {}
+    if 'language' in criteria:
+        queryset = filter_by_language(queryset, criteria['language'])
+    if 'stars_below' in criteria:
+        queryset = queryset.filter(stars__lt=criteria['stars_below'])
+    if 'stars_above' in criteria:
+        queryset = queryset.filter(stars__gt=criteria['stars_above'])
+    if 'not_synced_since' in criteria:
+        queryset = queryset.filter(
+            Q(last_synced_at__isnull=True) | Q(last_synced_at__lt=criteria['not_synced_since'])
+        )
+    return queryset
@@ -0,0 +1,309 @@
+"""
+Shared HTTP client for the GitHub REST API.
+
+Every view and background task goes through one pooled ``requests.Session``
+per process, so TCP/TLS connections to api.github.com are kept alive and
+reused instead of being re-established on each call.
+
+Repository lookups are conditional: the ETag/Last-Modified of each payload is
+kept in the ``github`` cache alias and replayed as If-None-Match /
+If-Modified-Since, so unchanged repos come back as a quota-free 304.
+
+Each call draws its token from the rate-limit governor in ``ratelimit``,
+which keeps the budget of every configured token in the shared cache.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+import httpx
+import requests
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import instrumentation, ratelimit
+
+# GitHub API conf
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+REQUEST_TIMEOUT = float(os.getenv("GITHUB_REQUEST_TIMEOUT", "10"))
+
+# Connection pool conf
+POOL_CONNECTIONS = int(os.getenv("GITHUB_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("GITHUB_POOL_MAXSIZE", "16"))
+RETRY_TOTAL = int(os.getenv("GITHUB_RETRY_TOTAL", "3"))
+RETRY_BACKOFF = float(os.getenv("GITHUB_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Conditional request cache, see CACHES['github'] in settings
+GITHUB_CACHE_ALIAS = "github"
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_github_headers():
+    # Authorization is added per call, see ratelimit.auth_headers
+    return {"Accept": "application/vnd.github+json"}
+
+
+def _build_session():
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        # Otherwise urllib3 retries 429s itself and sleeps out their Retry-After
+        # inside the request; github_get and ratelimit handle rate limits
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(get_github_headers())
+    return session
+
+
+def get_session():
+    """
+    Return this process's pooled session, creating it on first use.
+
+    The owning pid is tracked so a worker forked from a preloaded master
+    never shares sockets with its parent.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def rate_limit_status():
+    """Return the REST budget left across all tokens, shared by every process."""
+    return ratelimit.status()
+
+
+def github_get(path, **kwargs):
+    """
+    GET a REST API path with a token chosen by the rate-limit governor.
+
+    A call refused for rate limiting is retried once per remaining token;
+    raises ``ratelimit.RateLimitExceeded`` when none has budget left.
+    """
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    headers = kwargs.pop("headers", None) or {}
+
+    for _ in ratelimit.GITHUB_TOKENS:
+        token = ratelimit.acquire()
+        started = time.perf_counter()
+        response = get_session().get(
+            f"{GITHUB_API_URL}{path}",
+            headers={**headers, **ratelimit.auth_headers(token)},
+            **kwargs,
+        )
+        instrumentation.record_github_call(time.perf_counter() - started)
+        ratelimit.record(token, response.status_code, response.headers)
+        if not ratelimit.is_rate_limited(response.status_code, response.headers):
+            return response
+
+    raise ratelimit.RateLimitExceeded(ratelimit.retry_after(response.headers))
+
+
+class CachedResponse:
+    """A 200 response rebuilt from the cache after GitHub answered 304."""
+
+    status_code = 200
+    from_cache = True
+
+    def __init__(self, payload, headers):
+        self._payload = payload
+        self.headers = headers
+
+    def json(self):
+        return self._payload
+
+
+def _repo_cache_key(owner, repo):
+    # GitHub treats owner/repo case-insensitively
+    return f"repo:{owner.lower()}/{repo.lower()}"
+
+
+def _conditional_headers(cached):
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+def _cache_entry(response):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not (etag or last_modified):
+        return None
+    return {"etag": etag, "last_modified": last_modified, "payload": response.json()}
+
+
+def fetch_repo(owner, repo):
+    """
+    GET /repos/{owner}/{repo}, revalidating any cached copy.
+
+    Returns either the live ``requests.Response`` or a ``CachedResponse``
+    carrying the stored payload when GitHub reports it unchanged.
+    """
+    cache = caches[GITHUB_CACHE_ALIAS]
+    key = _repo_cache_key(owner, repo)
+    cached = cache.get(key)
+
+    response = github_get(f"/repos/{owner}/{repo}", headers=_conditional_headers(cached))
+
+    if response.status_code == 304 and cached:
+        cache.touch(key)
+        return CachedResponse(cached["payload"], response.headers)
+
+    if response.status_code == 200:
+        entry = _cache_entry(response)
+        if entry:
+            cache.set(key, entry)
+    elif response.status_code in (404, 410, 451):
+        cache.delete(key)
+
+    return response
+
+
+def github_error_message(status_code, owner, repo):
+    if status_code == 404:
+        return f"Repository '{owner}/{repo}' not found. It may be private, deleted, or doesn't exist."
+    if status_code == 403:
+        return f"Access denied to '{owner}/{repo}'. This repository may be private."
+    return f"GitHub API returned status {status_code}"
+
+
+def rate_limited_message(exc):
+    return f"GitHub API rate limit exhausted, retry in {exc.retry_after} seconds"
+
+
+# Async client, used by the ASGI views in api_integration
+
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_client():
+    """
+    Return the pooled ``httpx.AsyncClient`` for the running event loop.
+
+    httpx connections are bound to the loop that opened them, so there is a
+    client per loop. Under ASGI that is one long-lived client; under WSGI
+    Django runs each async view in a loop of its own, so the clients of
+    loops that have since closed are dropped here.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        for stale in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[stale]
+        client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            headers=get_github_headers(),
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=POOL_MAXSIZE,
+                max_keepalive_connections=POOL_MAXSIZE,
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=RETRY_TOTAL),
+        )
+        with _async_clients_lock:
+            _async_clients[loop] = client
+    return client
+
+
+async def agithub_get(path, **kwargs):
+    """Async counterpart of ``github_get``, retrying 5xx with backoff."""
+    client = get_async_client()
+    headers = kwargs.pop("headers", None) or {}
+
+    for _ in ratelimit.GITHUB_TOKENS:
+        token = await ratelimit.aacquire()
+        request_headers = {**headers, **ratelimit.auth_headers(token)}
+        for attempt in range(RETRY_TOTAL + 1):
+            started = time.perf_counter()
+            response = await client.get(path, headers=request_headers, **kwargs)
+            instrumentation.record_github_call(time.perf_counter() - started)
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                break
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+
+        await ratelimit.arecord(token, response.status_code, response.headers)
+        if not ratelimit.is_rate_limited(response.status_code, response.headers):
+            return response
+
+    raise ratelimit.RateLimitExceeded(ratelimit.retry_after(response.headers))
+
+
+async def afetch_repo(owner, repo):
+    """Async counterpart of ``fetch_repo`` sharing the same conditional cache."""
+    cache = caches[GITHUB_CACHE_ALIAS]
+    key = _repo_cache_key(owner, repo)
+    cached = await cache.aget(key)
+
+    response = await agithub_get(f"/repos/{owner}/{repo}", headers=_conditional_headers(cached))
+
+    if response.status_code == 304 and cached:
+        await cache.atouch(key)
+        return CachedResponse(cached["payload"], response.headers)
+
+    if response.status_code == 200:
+        entry = _cache_entry(response)
+        if entry:
+            await cache.aset(key, entry)
+    elif response.status_code in (404, 410, 451):
+        await cache.adelete(key)
+
+    return response
+
+
+def pool_stats():
+    """Summarise the connection pools held by this process's session."""
+    if _session is None or _session_pid != os.getpid():
+        return {"pid": os.getpid(), "session_active": False, "pools": []}
+
+    pools = []
+    # The same adapter is mounted for both schemes
+    adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+    for adapter in adapters.values():
+        manager = adapter.poolmanager
+        for key in manager.pools.keys():
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "maxsize": pool.pool.maxsize if pool.pool else 0,
+                "idle_connections": idle,
+                "connections_opened": pool.num_connections,
+                "requests_served": pool.num_requests,
+            })
+
+    return {
+        "pid": os.getpid(),
+        "session_active": True,
+        "pool_connections": POOL_CONNECTIONS,
+        "pool_maxsize": POOL_MAXSIZE,
+        "pools": pools,
+    }
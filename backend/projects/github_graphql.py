@@ -0,0 +1,139 @@
+"""
+Batch repository lookups through the GitHub GraphQL API.
+
+One query fetches up to GITHUB_GRAPHQL_BATCH_SIZE repositories, one aliased
+``repository`` field each, so refreshing N repos costs about N / 100
+requests instead of N REST calls. Results are reshaped like the REST
+payload so ``services.project_fields_from_github`` maps them unchanged.
+
+GraphQL has no anonymous access and no conditional requests, so callers
+choose between this and the REST path with ``use_graphql``.
+"""
+import os
+import time
+from . import github_client, instrumentation, ratelimit
+
+GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{github_client.GITHUB_API_URL}/graphql")
+GRAPHQL_BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", "100"))
+GRAPHQL_RESOURCE = "graphql"
+
+# rest, graphql, or auto: GraphQL whenever a token is configured
+FETCH_BACKEND = os.getenv("GITHUB_FETCH_BACKEND", "auto")
+FETCH_BACKENDS = ("auto", "rest", "graphql")
+
+REPOSITORY_FIELDS = """
+fragment repositoryFields on Repository {
+  name
+  nameWithOwner
+  owner { login }
+  description
+  primaryLanguage { name }
+  stargazerCount
+}
+"""
+
+# Per-alias error types and the REST status they stand for
+ERROR_STATUSES = {"NOT_FOUND": 404, "FORBIDDEN": 403}
+
+
+def use_graphql(backend=None):
+    backend = backend or FETCH_BACKEND
+    if backend == "auto":
+        return any(ratelimit.GITHUB_TOKENS)
+    return backend == "graphql"
+
+
+def build_query(full_names):
+    """Return (query, variables) looking up each owner/repo under alias r<i>."""
+    params, fields, variables = [], [], {}
+    for i, full_name in enumerate(full_names):
+        owner, _, name = full_name.partition("/")
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        fields.append(f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...repositoryFields }}")
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+
+    query = "query({}) {{\n{}\n}}\n{}".format(", ".join(params), "\n".join(fields), REPOSITORY_FIELDS)
+    return query, variables
+
+
+def rest_payload(node):
+    """Reshape a GraphQL repository node like GET /repos/{owner}/{repo}."""
+    return {
+        "name": node["name"],
+        "full_name": node["nameWithOwner"],
+        "owner": {"login": node["owner"]["login"]},
+        "description": node.get("description"),
+        "language": (node.get("primaryLanguage") or {}).get("name"),
+        "stargazers_count": node.get("stargazerCount", 0),
+    }
+
+
+def _post(query, variables, max_wait):
+    # Same token failover as github_client.github_get, on the graphql budget
+    for _ in ratelimit.GITHUB_TOKENS:
+        token = ratelimit.acquire(GRAPHQL_RESOURCE, max_wait=max_wait)
+        started = time.perf_counter()
+        response = github_client.get_session().post(
+            GRAPHQL_URL,
+            json={"query": query, "variables": variables},
+            headers=ratelimit.auth_headers(token),
+            timeout=github_client.REQUEST_TIMEOUT,
+        )
+        instrumentation.record_github_call(time.perf_counter() - started)
+        ratelimit.record(token, response.status_code, response.headers)
+        if ratelimit.is_rate_limited(response.status_code, response.headers):
+            continue
+
+        if response.status_code == 200:
+            body = response.json()
+            # Primary limit overruns come back as 200s with a RATE_LIMITED error
+            if any(error.get("type") == "RATE_LIMITED" for error in body.get("errors") or []):
+                ratelimit.exhaust(token, GRAPHQL_RESOURCE, ratelimit.retry_after(response.headers))
+                continue
+            return response.status_code, body
+        return response.status_code, None
+
+    raise ratelimit.RateLimitExceeded(ratelimit.retry_after(response.headers))
+
+
+def _fetch_batch(full_names, max_wait):
+    query, variables = build_query(full_names)
+    status_code, body = _post(query, variables, max_wait)
+    if body is None:
+        # The whole query failed, e.g. 401 for a bad token
+        return {full_name: (status_code, None) for full_name in full_names}
+
+    data = body.get("data") or {}
+    alias_errors = {}
+    for error in body.get("errors") or []:
+        path = error.get("path") or []
+        if path:
+            alias_errors[path[0]] = ERROR_STATUSES.get(error.get("type"), 502)
+
+    results = {}
+    for i, full_name in enumerate(full_names):
+        alias = f"r{i}"
+        node = data.get(alias)
+        if node:
+            results[full_name] = (200, rest_payload(node))
+        else:
+            results[full_name] = (alias_errors.get(alias, 404), None)
+    return results
+
+
+def fetch_repos(full_names, batch_size=GRAPHQL_BATCH_SIZE, max_wait=None):
+    """
+    Look up many owner/repo names, ``batch_size`` per GraphQL request.
+
+    Returns a dict mapping each name to (status_code, payload): 200 and a
+    REST-shaped payload, or the REST status matching the error (404, 403,
+    ...) and None. Errors on one alias leave the rest of its batch intact.
+    Raises ``ratelimit.RateLimitExceeded`` or ``requests.RequestException``
+    for failures of a whole request.
+    """
+    unique = list(dict.fromkeys(full_names))
+    results = {}
+    for start in range(0, len(unique), batch_size):
+        results.update(_fetch_batch(unique[start:start + batch_size], max_wait))
+    return results
@@ -0,0 +1,225 @@
+"""
+Per-request performance accounting, see middleware.PerformanceMiddleware.
+
+The metrics of the request being served live in a context variable, which
+follows the request into sync_to_async threads and, when copied explicitly,
+into worker threads (see api_integration.bulk_import_github_repos). Database
+time is captured by an execute wrapper installed on every connection and
+GitHub time by github_client/github_graphql reporting each call here.
+
+Prometheus histograms are exported on /metrics when METRICS_ENABLED is set
+and prometheus_client is installed, to staff users and to the addresses in
+METRICS_ALLOWED_IPS; set PROMETHEUS_MULTIPROC_DIR to aggregate across
+gunicorn workers. Database pool usage is read from the
+psycopg pools at scrape time, see database_stats.
+"""
+import contextvars
+import ipaddress
+import os
+import threading
+import time
+from django.db import connections
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # optional, only needed for /metrics
+    prometheus_client = None
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() in ("1", "true", "yes")
+# Addresses or networks (10.0.0.0/8) that may scrape /metrics without logging in
+METRICS_ALLOWED_IPS = [
+    ipaddress.ip_network(network.strip())
+    for network in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if network.strip()
+]
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Timings collected while serving one request; safe to share across threads."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.github_time = 0.0
+        self.github_calls = 0
+        self.render_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_time += seconds
+            self.db_queries += 1
+
+    def add_github_call(self, seconds):
+        with self._lock:
+            self.github_time += seconds
+            self.github_calls += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_github_call(seconds):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_github_call(seconds)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection by signals.install_query_timer."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(time.perf_counter() - started)
+
+
+def database_stats():
+    """Connection settings per database, with psycopg pool usage where pooled."""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        # Only the PostgreSQL backend has a pool, and only with OPTIONS['pool']
+        pool = getattr(connection, "pool", None)
+        stats[alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "conn_health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "pool": pool.get_stats() if pool is not None else None,
+        }
+    return stats
+
+
+# Prometheus
+
+if prometheus_client is not None:
+    REQUEST_DURATION = prometheus_client.Histogram(
+        "repo_tracker_request_duration_seconds",
+        "Wall time spent serving a request",
+        ["view", "method"],
+    )
+    REQUESTS = prometheus_client.Counter(
+        "repo_tracker_requests",
+        "Requests served",
+        ["view", "method", "status"],
+    )
+    DB_DURATION = prometheus_client.Histogram(
+        "repo_tracker_db_duration_seconds",
+        "Database time per request",
+        ["view"],
+    )
+    DB_QUERIES = prometheus_client.Histogram(
+        "repo_tracker_db_queries",
+        "Database queries per request",
+        ["view"],
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+    )
+    GITHUB_DURATION = prometheus_client.Histogram(
+        "repo_tracker_github_duration_seconds",
+        "GitHub API time per request, for requests that called it",
+        ["view"],
+    )
+
+
+    class DatabasePoolCollector:
+        """Usage of this process' psycopg connection pools, read at scrape time."""
+
+        def describe(self):
+            # Keeps register() from collecting, and creating the pools, at import
+            return []
+
+        def collect(self):
+            pooled = {
+                alias: stats["pool"] for alias, stats in database_stats().items() if stats["pool"] is not None
+            }
+            if not pooled:
+                return
+
+            pool_connections = GaugeMetricFamily(
+                "repo_tracker_db_pool_connections", "Connections in the pool", labels=["alias", "state"]
+            )
+            waiting = GaugeMetricFamily(
+                "repo_tracker_db_pool_waiting", "Requests waiting for a connection", labels=["alias"]
+            )
+            requests = CounterMetricFamily(
+                "repo_tracker_db_pool_requests", "Connections handed out by the pool", labels=["alias"]
+            )
+            wait = CounterMetricFamily(
+                "repo_tracker_db_pool_wait_seconds", "Time spent waiting for a connection", labels=["alias"]
+            )
+            errors = CounterMetricFamily(
+                "repo_tracker_db_pool_errors", "Requests that timed out waiting for a connection", labels=["alias"]
+            )
+            for alias, stats in pooled.items():
+                # psycopg_pool omits counters that are still zero
+                available = stats.get("pool_available", 0)
+                pool_connections.add_metric([alias, "idle"], available)
+                pool_connections.add_metric([alias, "in_use"], stats.get("pool_size", 0) - available)
+                waiting.add_metric([alias], stats.get("requests_waiting", 0))
+                requests.add_metric([alias], stats.get("requests_num", 0))
+                wait.add_metric([alias], stats.get("requests_wait_ms", 0) / 1000)
+                errors.add_metric([alias], stats.get("requests_errors", 0))
+            yield from (pool_connections, waiting, requests, wait, errors)
+
+    prometheus_client.REGISTRY.register(DatabasePoolCollector())
+
+
+def observe(view, method, status, metrics, elapsed):
+    if not METRICS_ENABLED or prometheus_client is None:
+        return
+    REQUEST_DURATION.labels(view, method).observe(elapsed)
+    REQUESTS.labels(view, method, str(status)).inc()
+    DB_DURATION.labels(view).observe(metrics.db_time)
+    DB_QUERIES.labels(view).observe(metrics.db_queries)
+    if metrics.github_calls:
+        GITHUB_DURATION.labels(view).observe(metrics.github_time)
+
+
+def _scraper_allowed(address):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_IPS)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the histograms above."""
+    if not METRICS_ENABLED or prometheus_client is None:
+        raise Http404("Metrics are disabled")
+    if not (request.user.is_staff or _scraper_allowed(request.META.get("REMOTE_ADDR"))):
+        raise PermissionDenied
+
+    registry = prometheus_client.REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Pool gauges can't be aggregated; these are the answering worker's
+        registry.register(DatabasePoolCollector())
+    return HttpResponse(
+        prometheus_client.generate_latest(registry),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
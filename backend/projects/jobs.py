@@ -0,0 +1,261 @@
+"""
+A small durable job queue kept in the projects database.
+
+Jobs are rows of the Job model. ``manage.py run_worker`` claims due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker threads and
+processes share one queue without ever handing out a job twice. Failed
+attempts are retried with exponential backoff until ``max_attempts``, and a
+key (one repository) has at most one queued or running job: enqueueing it
+again returns the job that is already on its way.
+
+The only kind so far is ``sync_repo``: fetch one owner/repo from GitHub and
+upsert it, which covers both imports and refreshes.
+"""
+import logging
+import os
+import random
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+import requests
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from . import github_client, github_graphql, ratelimit
+from .github_client import github_error_message, rate_limited_message
+from .models import Job, Project
+from .services import project_fields_from_github, upsert_key, upsert_projects
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Retry n waits about JOB_RETRY_BASE * 2**(n-1) seconds, capped at JOB_RETRY_MAX
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "10"))
+JOB_RETRY_MAX = float(os.getenv("JOB_RETRY_MAX", "3600"))
+# Running jobs not finished within this many seconds are assumed lost with their worker
+JOB_LEASE = float(os.getenv("JOB_LEASE", "600"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+SYNC_REPO = "sync_repo"
+
+logger = logging.getLogger(__name__)
+
+
+def repo_key(full_name):
+    # GitHub names are case-insensitive
+    return f"{SYNC_REPO}:{full_name.lower()}"
+
+
+def enqueue(kind, key, payload):
+    """Queue a job unless one is already active for key; returns (job, created)."""
+    job = Job.objects.filter(key=key, status__in=Job.ACTIVE_STATUSES).first()
+    if job is not None:
+        return job, False
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, key=key, payload=payload, max_attempts=JOB_MAX_ATTEMPTS), True
+    except IntegrityError:
+        # Queued by someone else since the lookup
+        return Job.objects.filter(key=key).latest("id"), False
+
+
+def enqueue_repo(full_name):
+    return enqueue(SYNC_REPO, repo_key(full_name), {"full_name": full_name})
+
+
+def enqueue_repos(full_names):
+    """Queue a sync_repo job per owner/repo; returns {full_name: (job, created)}."""
+    keys = {full_name: repo_key(full_name) for full_name in full_names}
+    active = {
+        job.key: job
+        for job in Job.objects.filter(key__in=set(keys.values()), status__in=Job.ACTIVE_STATUSES)
+    }
+    new = {}
+    for full_name, key in keys.items():
+        if key not in active and key not in new:
+            new[key] = Job(kind=SYNC_REPO, key=key, payload={"full_name": full_name}, max_attempts=JOB_MAX_ATTEMPTS)
+
+    if new:
+        try:
+            with transaction.atomic():
+                Job.objects.bulk_create(new.values(), batch_size=500)
+        except IntegrityError:
+            # A concurrent request queued some of the same repos; settle them one by one
+            return {full_name: enqueue_repo(full_name) for full_name in keys}
+
+    queued = {}
+    for full_name, key in keys.items():
+        if key in active:
+            queued[full_name] = (active[key], False)
+        else:
+            queued[full_name] = (new[key], True)
+            # Names differing only in case share the job created for the first
+            active[key] = new[key]
+    return queued
+
+
+def claim_batch_size():
+    # GraphQL looks up a whole batch in one request; REST goes one repo at a time
+    return github_graphql.GRAPHQL_BATCH_SIZE if github_graphql.use_graphql() else 1
+
+
+def claim(worker, limit=1):
+    """Mark up to ``limit`` due jobs as running for this worker and return them."""
+    now = timezone.now()
+    lock = f"{worker}:{uuid.uuid4().hex[:8]}"
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by("run_after", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # Without FOR UPDATE (SQLite) two workers can select the same rows;
+        # the status check lets only one of them take each
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=lock, locked_at=now, attempts=F("attempts") + 1, updated_at=now,
+        )
+    return list(Job.objects.filter(locked_by=lock, status=Job.RUNNING).order_by("run_after", "id"))
+
+
+def _finish(job, **fields):
+    # Only the worker still holding the lease may record the outcome
+    fields["updated_at"] = timezone.now()
+    updated = Job.objects.filter(id=job.id, status=Job.RUNNING, locked_by=job.locked_by).update(**fields)
+    for field, value in fields.items():
+        setattr(job, field, value)
+    return bool(updated)
+
+
+def complete(job, result):
+    return _finish(job, status=Job.SUCCEEDED, result=result, last_error="", finished_at=timezone.now())
+
+
+def fail(job, error):
+    return _finish(job, status=Job.FAILED, last_error=error, finished_at=timezone.now())
+
+
+def backoff(attempts):
+    delay = min(JOB_RETRY_MAX, JOB_RETRY_BASE * 2 ** (attempts - 1))
+    # Jitter, so jobs that failed together don't all come back together
+    return delay * random.uniform(0.5, 1.0)
+
+
+def retry(job, error, delay=None, count_attempt=True):
+    """Put a job back in the queue, or fail it once it is out of attempts."""
+    attempts = job.attempts if count_attempt else job.attempts - 1
+    if attempts >= job.max_attempts:
+        return fail(job, error)
+    if delay is None:
+        delay = backoff(attempts)
+    return _finish(
+        job,
+        status=Job.QUEUED,
+        attempts=attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        last_error=error,
+        locked_by="",
+        locked_at=None,
+    )
+
+
+def _fetch(full_names):
+    """{full_name: (status_code, repo_data)}; raises if GitHub can't be reached."""
+    if github_graphql.use_graphql():
+        return github_graphql.fetch_repos(full_names)
+    fetched = {}
+    for full_name in full_names:
+        owner, _, repo = full_name.partition("/")
+        response = github_client.fetch_repo(owner, repo)
+        fetched[full_name] = (response.status_code, response.json() if response.status_code == 200 else None)
+    return fetched
+
+
+def sync_repos(jobs):
+    try:
+        fetched = _fetch([job.payload["full_name"] for job in jobs])
+    except ratelimit.RateLimitExceeded as exc:
+        # Waiting out the reset is not the job's fault, so it costs no attempt
+        for job in jobs:
+            retry(job, rate_limited_message(exc), delay=exc.retry_after, count_attempt=False)
+        return
+    except requests.RequestException:
+        for job in jobs:
+            retry(job, "Failed to connect to GitHub API")
+        return
+
+    records = []
+    for job in jobs:
+        full_name = job.payload["full_name"]
+        status_code, repo_data = fetched[full_name]
+        if status_code == 200:
+            records.append((job, project_fields_from_github(repo_data)))
+            continue
+        owner, _, repo = full_name.partition("/")
+        if status_code >= 500:
+            retry(job, github_error_message(status_code, owner, repo))
+        else:
+            fail(job, github_error_message(status_code, owner, repo))
+            # Push a tracked project to the back of the refresh queue, as refresh_projects does
+            Project.objects.filter(full_name=full_name).update(last_synced_at=timezone.now())
+
+    if not records:
+        return
+    saved = upsert_projects([record for _, record in records])
+    for job, record in records:
+        project, is_new = saved[upsert_key(record)]
+        complete(job, {
+            "project_id": project.id,
+            "name": project.name,
+            "action": "imported" if is_new else "updated",
+        })
+
+
+HANDLERS = {
+    SYNC_REPO: sync_repos,
+}
+
+
+def run(jobs):
+    """Run claimed jobs, grouped by kind; returns a Counter of final statuses."""
+    by_kind = defaultdict(list)
+    for job in jobs:
+        by_kind[job.kind].append(job)
+
+    for kind, group in by_kind.items():
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            for job in group:
+                fail(job, f"Unknown job kind '{kind}'")
+            continue
+        try:
+            handler(group)
+        except Exception as exc:
+            logger.exception("%s jobs failed", kind)
+            for job in group:
+                if job.status == Job.RUNNING:
+                    retry(job, f"{type(exc).__name__}: {exc}")
+
+    return Counter(job.status for job in jobs)
+
+
+def requeue_expired(lease=JOB_LEASE):
+    """Return running jobs whose worker stopped reporting back to the queue."""
+    now = timezone.now()
+    expired = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=lease))
+    # A job that keeps taking its worker down is not retried forever
+    expired.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, last_error="Worker lease expired", finished_at=now, updated_at=now,
+    )
+    return expired.update(
+        status=Job.QUEUED, locked_by="", locked_at=None, run_after=now,
+        last_error="Worker lease expired", updated_at=now,
+    )
+
+
+def prune_finished(days=JOB_RETENTION_DAYS):
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.SUCCEEDED, Job.FAILED), finished_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -0,0 +1,300 @@
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from projects import github_client, github_graphql, ratelimit
+from projects.caching import invalidate_project_caches
+from projects.fake_github import FakeGitHub
+from projects.models import Project
+from projects.renderers import FastJSONRenderer
+from projects.serializers import ProjectSerializer
+
+SEED_BATCH_SIZE = 5000
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', 'TypeScript', 'Java', 'C++', 'Ruby', None]
+WORDS = [
+    'fast', 'async', 'http', 'client', 'parser', 'database', 'orm', 'cache', 'queue', 'graph',
+    'web', 'framework', 'cli', 'tool', 'library', 'compiler', 'runtime', 'search', 'index', 'stream',
+]
+
+# Private caches, so a shared Redis is never polluted and runs start cold
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+    'github': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-github'},
+}
+
+SCENARIOS = (
+    'project-list', 'project-list-cached', 'project-list-page', 'project-list-large', 'project-filter',
+    'project-search', 'save-github-repo', 'delete-project',
+)
+SERIALIZATION_ROWS = 10000
+SERIALIZATION_PASSES = 3
+
+
+def _percentile(values, percent):
+    # Nearest rank on an already sorted list
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API hot paths on a seeded test database against a local GitHub stand-in'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000,
+                            help='Projects seeded before the run (default: 10000)')
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Requests per scenario (default: 50)')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                            help='Scenario to run; repeat for several (default: all)')
+        parser.add_argument('--github-latency', type=float, default=50,
+                            help='Milliseconds the GitHub stand-in waits per request (default: 50)')
+        parser.add_argument('--rate-limit', type=int,
+                            help='Requests the GitHub stand-in allows per hour (default: unlimited)')
+        parser.add_argument('--output', default='benchmark-report.json',
+                            help="Where to write the JSON report, '-' for stdout (default: benchmark-report.json)")
+        parser.add_argument('--compare',
+                            help='Earlier report to compare against; fails on regressions')
+        parser.add_argument('--threshold', type=float, default=20,
+                            help='p95 latency increase, in percent, counted as a regression (default: 20)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database, and its seeded rows, between runs')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['rows'] < options['iterations']:
+            raise CommandError('--rows must be at least --iterations')
+        baseline = self.load_report(options['compare']) if options['compare'] else None
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'], serialize=False)
+        github = FakeGitHub(latency=options['github_latency'] / 1000, rate_limit=options['rate_limit'])
+        request_log = logging.getLogger('projects.performance')
+        log_level = request_log.level
+
+        try:
+            github.start()
+            request_log.setLevel(logging.WARNING)
+            with override_settings(CACHES=BENCHMARK_CACHES), self.use_github(github.url):
+                self.seed(options['rows'], options['seed'])
+                report = self.run_scenarios(options, github)
+        finally:
+            request_log.setLevel(log_level)
+            github.stop()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.write_report(report, options['output'])
+        if baseline:
+            self.compare(baseline, report, options['threshold'])
+
+    @contextmanager
+    def use_github(self, url):
+        # Point the GitHub clients at the stand-in, with a token of its own
+        saved = (github_client.GITHUB_API_URL, github_graphql.GRAPHQL_URL, ratelimit.GITHUB_TOKENS)
+        github_client.GITHUB_API_URL = url
+        github_graphql.GRAPHQL_URL = f'{url}/graphql'
+        ratelimit.GITHUB_TOKENS = ['benchmark']
+        try:
+            yield
+        finally:
+            github_client.GITHUB_API_URL, github_graphql.GRAPHQL_URL, ratelimit.GITHUB_TOKENS = saved
+
+    def seed(self, rows, seed):
+        if Project.objects.count() == rows:
+            self.stderr.write(f'Reusing {rows} seeded projects')
+            return
+        Project.objects.all().delete()
+
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        batch = []
+        for i in range(rows):
+            owner = f'owner{i % 997}'
+            batch.append(Project(
+                name=f'repo-{i}',
+                owner=owner,
+                full_name=f'{owner}/repo-{i}',
+                description=' '.join(rng.sample(WORDS, 4)),
+                language=rng.choice(LANGUAGES),
+                stars=int(rng.paretovariate(1.2)) - 1,
+            ))
+            if len(batch) == SEED_BATCH_SIZE:
+                Project.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Project.objects.bulk_create(batch)
+        self.stderr.write(f'Seeded {rows} projects in {time.perf_counter() - started:.1f}s')
+
+    def run_scenarios(self, options, github):
+        client = Client()
+        client.force_login(User.objects.create_superuser('benchmark', 'benchmark@example.com', None))
+        iterations = options['iterations']
+        ids = list(Project.objects.order_by('id').values_list('id', flat=True)[:iterations])
+        pages = {'next': None}
+
+        def next_page(i):
+            response = client.get(pages['next'] or '/api/projects/', secure=True)
+            pages['next'] = response.json().get('next')
+            return response
+
+        scenarios = {
+            'project-list': (invalidate_project_caches, lambda i: client.get('/api/projects/', secure=True)),
+            'project-list-cached': (None, lambda i: client.get('/api/projects/', secure=True)),
+            'project-list-page': (invalidate_project_caches, next_page),
+            'project-list-large': (invalidate_project_caches, lambda i: client.get(
+                '/api/projects/', {'page_size': 500}, secure=True)),
+            'project-filter': (invalidate_project_caches, lambda i: client.get(
+                '/api/projects/', {'language': LANGUAGES[i % (len(LANGUAGES) - 1)]}, secure=True)),
+            'project-search': (invalidate_project_caches, lambda i: client.get(
+                '/api/projects/', {'search': WORDS[i % len(WORDS)]}, secure=True)),
+            # Alternate between importing a new repo and updating a seeded one
+            'save-github-repo': (None, lambda i: client.post(
+                f'/api/github/save/bench/new-{i}/' if i % 2 == 0 else f'/api/github/save/owner{i % 997}/repo-{i}/',
+                secure=True)),
+            'delete-project': (None, lambda i: client.delete(f'/api/projects/{ids[i]}/delete/', secure=True)),
+        }
+
+        results = {}
+        for name in SCENARIOS:
+            if options['scenario'] and name not in options['scenario']:
+                continue
+            prepare, send = scenarios[name]
+            results[name] = self.measure(iterations, prepare, send, github)
+            summary = results[name]
+            self.stderr.write(
+                f"{name}: p50 {summary['latency_ms']['p50']}ms, p95 {summary['latency_ms']['p95']}ms, "
+                f"{summary['queries']['mean']} queries, {summary['throughput_rps']} req/s"
+            )
+
+        serialization = self.measure_serialization(min(options['rows'], SERIALIZATION_ROWS))
+        self.stderr.write(
+            f"serialization: ProjectSerializer {serialization['serializer_rows_per_sec']} rows/s, "
+            f"values() {serialization['values_rows_per_sec']} rows/s ({serialization['speedup']}x)"
+        )
+
+        return {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'rows': options['rows'],
+            'iterations': iterations,
+            'github': {'latency_ms': options['github_latency'], 'rate_limit': options['rate_limit']},
+            'scenarios': results,
+            'serialization': serialization,
+        }
+
+    def measure_serialization(self, rows):
+        # The list endpoint's two ways of turning rows into JSON, queries included
+        queryset = Project.objects.order_by('-created_at', '-id')[:rows]
+        fields = list(ProjectSerializer().fields)
+
+        def serializer():
+            return JSONRenderer().render(ProjectSerializer(queryset.all(), many=True).data)
+
+        def values():
+            return FastJSONRenderer().render(list(queryset.values(*fields)))
+
+        timings = {}
+        for name, render in (('serializer', serializer), ('values', values)):
+            best = None
+            for _ in range(SERIALIZATION_PASSES):
+                started = time.perf_counter()
+                output = render()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = (best, output)
+
+        return {
+            'rows': rows,
+            'serializer_rows_per_sec': round(rows / timings['serializer'][0]),
+            'values_rows_per_sec': round(rows / timings['values'][0]),
+            'speedup': round(timings['serializer'][0] / timings['values'][0], 1),
+            'identical_output': timings['serializer'][1] == timings['values'][1],
+        }
+
+    def measure(self, iterations, prepare, send, github):
+        latencies, queries, statuses = [], [], Counter()
+        github_requests = github.requests
+        elapsed = 0.0
+
+        for i in range(iterations):
+            if prepare:
+                prepare()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = send(i)
+                latency = time.perf_counter() - started
+            elapsed += latency
+            latencies.append(latency * 1000)
+            queries.append(len(captured.captured_queries))
+            statuses[str(response.status_code)] += 1
+
+        latencies.sort()
+        return {
+            'requests': iterations,
+            'errors': sum(count for status, count in statuses.items() if int(status) >= 400),
+            'statuses': dict(statuses),
+            'throughput_rps': round(iterations / elapsed, 1) if elapsed else None,
+            'latency_ms': {
+                'min': round(latencies[0], 2),
+                'mean': round(sum(latencies) / iterations, 2),
+                'p50': round(_percentile(latencies, 50), 2),
+                'p95': round(_percentile(latencies, 95), 2),
+                'p99': round(_percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries': {
+                'min': min(queries),
+                'mean': round(sum(queries) / iterations, 2),
+                'max': max(queries),
+            },
+            'github_requests': github.requests - github_requests,
+        }
+
+    def load_report(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read report {path}: {exc}')
+
+    def write_report(self, report, output):
+        if output == '-':
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+            return
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+
+    def compare(self, baseline, report, threshold):
+        regressions = []
+        for name, current in report['scenarios'].items():
+            previous = baseline.get('scenarios', {}).get(name)
+            if previous is None:
+                continue
+            old_p95, new_p95 = previous['latency_ms']['p95'], current['latency_ms']['p95']
+            change = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0
+            self.stdout.write(
+                f"{name}: p95 {old_p95} -> {new_p95}ms ({change:+.0f}%), "
+                f"queries {previous['queries']['max']} -> {current['queries']['max']}"
+            )
+            if change > threshold:
+                regressions.append(f'{name} p95 {change:+.0f}%')
+            if current['queries']['max'] > previous['queries']['max']:
+                regressions.append(f"{name} queries {previous['queries']['max']} -> {current['queries']['max']}")
+
+        if regressions:
+            raise CommandError('Regressions: ' + ', '.join(regressions))
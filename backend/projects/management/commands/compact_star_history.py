@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber, TruncDay, TruncWeek
+from django.utils import timezone
+from projects.models import StarSnapshot
+
+BUCKETS = {'day': TruncDay, 'week': TruncWeek}
+
+
+class Command(BaseCommand):
+    help = 'Downsample old star snapshots to the last one per project per day or week'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=30,
+                            help='Only compact snapshots older than this many days (default: 30)')
+        parser.add_argument('--bucket', choices=sorted(BUCKETS), default='day',
+                            help='Keep one snapshot per project per bucket (default: day)')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Rows deleted per statement (default: 10000)')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        bucket = BUCKETS[options['bucket']]('captured_at')
+
+        # Everything but the latest snapshot of each (project, bucket)
+        redundant = (
+            StarSnapshot.objects
+            .filter(captured_at__lt=cutoff)
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F('project_id'), bucket],
+                order_by=F('captured_at').desc(),
+            ))
+            .filter(position__gt=1)
+            .values_list('id', flat=True)
+        )
+
+        deleted = 0
+        while True:
+            ids = list(redundant[:options['batch_size']])
+            if not ids:
+                break
+            count, _ = StarSnapshot.objects.filter(id__in=ids).delete()
+            deleted += count
+
+        self.stdout.write(f"Deleted {deleted} snapshots older than {options['older_than']} days")
@@ -1,12 +1,19 @@
+import os
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 
 class Command(BaseCommand):
-    help = 'Create admin superuser'
+    help = ('Create the admin superuser if it does not exist yet, from DJANGO_SUPERUSER_USERNAME, '
+            'DJANGO_SUPERUSER_EMAIL and DJANGO_SUPERUSER_PASSWORD; safe to run on every deploy')
 
     def handle(self, *args, **options):
-        if not User.objects.filter(username='admin').exists():
-            User.objects.create_superuser('admin', 'admin@demo.com', 'admin123')
-            self.stdout.write('Admin user created successfully')
+        username = os.getenv('DJANGO_SUPERUSER_USERNAME', 'admin')
+        email = os.getenv('DJANGO_SUPERUSER_EMAIL', 'admin@demo.com')
+        password = os.getenv('DJANGO_SUPERUSER_PASSWORD', 'admin123')
+
+        # Existing users are left alone, so a changed password is never reset
+        if not User.objects.filter(username=username).exists():
+            User.objects.create_superuser(username, email, password)
+            self.stdout.write(f"Admin user '{username}' created successfully")
         else:
-            self.stdout.write('Admin user already exists')
\ No newline at end of file
+            self.stdout.write(f"Admin user '{username}' already exists")
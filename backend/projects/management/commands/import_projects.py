@@ -0,0 +1,154 @@
+import csv
+import json
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from projects.serializers import ProjectImportSerializer
+from projects.services import project_fields_from_github, upsert_projects
+
+FORMATS = ('csv', 'ndjson', 'json')
+MAX_REPORTED_ERRORS = 20
+
+
+def _is_github_payload(raw):
+    return 'stargazers_count' in raw or 'html_url' in raw
+
+
+def format_errors(detail):
+    """Flatten a ValidationError's detail into 'field: message' text."""
+    if isinstance(detail, dict):
+        return '; '.join(f'{field}: {format_errors(errors)}' for field, errors in detail.items())
+    if isinstance(detail, list):
+        return ' '.join(format_errors(error) for error in detail)
+    return str(detail)
+
+
+class Command(BaseCommand):
+    help = 'Bulk import projects from a CSV, NDJSON or GitHub API JSON dump'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format (default: from the file extension, else ndjson)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Records upserted per transaction (default: 1000)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the input without writing anything')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or self.guess_format(options['path'])
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        # One serializer validates every record, as ListSerializer does for its
+        # children, so its fields are only built once
+        self.validator = ProjectImportSerializer()
+
+        stream = sys.stdin if options['path'] == '-' else self.open(options['path'])
+        started = time.monotonic()
+        processed = imported = invalid = 0
+        chunk = []
+
+        try:
+            for line_number, raw in self.read_records(stream, fmt):
+                processed += 1
+                record, errors = self.clean(raw)
+                if errors:
+                    invalid += 1
+                    if invalid <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f'Record {line_number}: {errors}')
+                    continue
+
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    imported += self.flush(chunk, options['dry_run'])
+                    chunk = []
+                    self.report(processed, imported, invalid, started)
+
+            if chunk:
+                imported += self.flush(chunk, options['dry_run'])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.report(processed, imported, invalid, started)
+        if invalid > MAX_REPORTED_ERRORS:
+            self.stderr.write(f'... {invalid - MAX_REPORTED_ERRORS} more invalid records not shown')
+        self.stdout.write(self.style.SUCCESS('Import dry run complete' if options['dry_run'] else 'Import complete'))
+
+    def guess_format(self, path):
+        for fmt in FORMATS:
+            if path.endswith(f'.{fmt}'):
+                return fmt
+        return 'ndjson'
+
+    def open(self, path):
+        try:
+            return open(path, newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+    def read_records(self, stream, fmt):
+        """Yield (position, dict) pairs without loading the file, except for JSON arrays."""
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == 'ndjson':
+            for line_number, line in enumerate(stream, start=1):
+                if line.strip():
+                    yield line_number, self.parse_json(line, line_number)
+        else:
+            # A plain JSON array, e.g. a saved /orgs/{org}/repos response
+            try:
+                records = json.load(stream)
+            except ValueError as exc:
+                raise CommandError(f'Invalid JSON: {exc}')
+            if not isinstance(records, list):
+                raise CommandError('Expected a JSON array of records')
+            yield from enumerate(records, start=1)
+
+    def parse_json(self, line, line_number):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return {'__invalid__': f'line {line_number} is not valid JSON'}
+
+    def clean(self, raw):
+        if not isinstance(raw, dict):
+            return None, 'expected an object'
+        if '__invalid__' in raw:
+            return None, raw['__invalid__']
+
+        synced_at = None
+        if _is_github_payload(raw):
+            if 'name' not in raw:
+                return None, 'name: This field is required.'
+            raw = project_fields_from_github(raw)
+            synced_at = raw.pop('last_synced_at')
+        else:
+            # Empty CSV cells mean "not provided"
+            raw = {key: value for key, value in raw.items() if key and value != ''}
+
+        try:
+            record = dict(self.validator.run_validation(raw))
+        except ValidationError as exc:
+            return None, format_errors(exc.detail)
+
+        if synced_at is not None:
+            record['last_synced_at'] = synced_at
+        return record, None
+
+    def flush(self, chunk, dry_run):
+        if dry_run:
+            return len(chunk)
+        return len(upsert_projects(chunk, chunk_size=len(chunk)))
+
+    def report(self, processed, imported, invalid, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{processed} read, {imported} upserted, {invalid} invalid '
+            f'({processed / elapsed:,.0f} records/s)'
+        )
@@ -0,0 +1,209 @@
+import time
+from datetime import timedelta
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.db.models import F, Q
+from django.utils import timezone
+from projects import github_client, github_graphql, jobs, ratelimit
+from projects.models import Project
+from projects.services import UPSERT_UPDATE_FIELDS, project_fields_from_github, record_star_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Refresh tracked projects from GitHub, stalest first, paced to the rate limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Refresh every stale project once and exit instead of running forever')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Projects picked per pass (default: 100)')
+        parser.add_argument('--stale-after', type=int, default=360,
+                            help='Minutes since the last sync before a project is refreshed again (default: 360)')
+        parser.add_argument('--spread', type=float, default=300,
+                            help='Seconds over which each batch is spread (default: 300)')
+        parser.add_argument('--reserve', type=int, default=100,
+                            help='GitHub requests left untouched for interactive use (default: 100)')
+        parser.add_argument('--poll', type=float, default=60,
+                            help='Seconds to sleep when nothing is stale (default: 60)')
+        parser.add_argument('--backend', choices=github_graphql.FETCH_BACKENDS,
+                            help='Fetch through REST or GraphQL batches (default: GITHUB_FETCH_BACKEND, '
+                                 'auto = GraphQL when a token is configured)')
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Queue a job per stale project for run_worker instead of fetching here')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            return self.enqueue_stale(options)
+
+        started = timezone.now()
+        use_graphql = github_graphql.use_graphql(options['backend'])
+        # Failed refreshes leave last_synced_at alone, so without this the
+        # same projects would stay the stalest and be picked again at once
+        attempted = set()
+        failed = failed_passes = 0
+        self.connection_errors = 0
+
+        while True:
+            cutoff = timezone.now() - timedelta(minutes=options['stale_after'])
+            if options['once']:
+                # Rows synced during this run are never picked up again
+                cutoff = min(cutoff, started)
+            batch = self.stale_projects(cutoff, options['batch_size'], exclude=attempted)
+
+            if not batch:
+                if options['once']:
+                    if failed:
+                        raise CommandError(f'{failed} projects could not be refreshed')
+                    break
+                # Every stale project has had its turn; failed ones get another
+                attempted.clear()
+                time.sleep(options['poll'])
+                continue
+            attempted.update(project.id for project in batch)
+
+            if use_graphql:
+                refreshed = self.refresh_batch_graphql(batch)
+            else:
+                refreshed = self.refresh_batch(batch, options['spread'], options['reserve'])
+            self.stdout.write(f'Refreshed {refreshed}/{len(batch)} projects')
+            failed += len(batch) - refreshed
+
+            # Connection errors have backed off already; anything else that
+            # fails a whole pass would otherwise be retried in a tight loop
+            if refreshed or options['once'] or self.connection_errors:
+                failed_passes = 0
+                continue
+            failed_passes += 1
+            delay = jobs.backoff(failed_passes)
+            self.stdout.write(f'No project refreshed, retrying in {delay:.0f}s')
+            time.sleep(delay)
+
+    def enqueue_stale(self, options):
+        # Projects already queued keep their job, so every pass can cover them all
+        while True:
+            cutoff = timezone.now() - timedelta(minutes=options['stale_after'])
+            full_names = list(self.stale_queryset(cutoff).values_list('full_name', flat=True))
+            queued = jobs.enqueue_repos(full_names)
+            created = sum(1 for _, is_new in queued.values() if is_new)
+            self.stdout.write(f'Queued {created} of {len(full_names)} stale projects')
+            if options['once']:
+                break
+            time.sleep(options['poll'])
+
+    def stale_queryset(self, cutoff):
+        return (
+            Project.objects
+            .exclude(full_name__isnull=True).exclude(full_name='')
+            .filter(Q(last_synced_at__isnull=True) | Q(last_synced_at__lt=cutoff))
+            .order_by(F('last_synced_at').asc(nulls_first=True), 'id')
+        )
+
+    def stale_projects(self, cutoff, batch_size, exclude=()):
+        return list(self.stale_queryset(cutoff).exclude(id__in=exclude)[:batch_size])
+
+    def refresh_batch(self, batch, spread, reserve):
+        refreshed = 0
+        spacing = spread / len(batch)
+
+        for project in batch:
+            self.wait_for_budget(reserve)
+            request_started = time.monotonic()
+
+            if self.refresh_project(project):
+                refreshed += 1
+
+            # Never go faster than the remaining budget allows before reset
+            delay = max(spacing, self.budget_spacing(reserve)) - (time.monotonic() - request_started)
+            if delay > 0:
+                time.sleep(delay)
+
+        return refreshed
+
+    def refresh_batch_graphql(self, batch):
+        # One request per GITHUB_GRAPHQL_BATCH_SIZE projects, so no pacing
+        try:
+            results = github_graphql.fetch_repos([project.full_name for project in batch])
+        except ratelimit.RateLimitExceeded as exc:
+            self.stdout.write(f'Rate limit budget exhausted, sleeping {exc.retry_after}s until reset')
+            time.sleep(exc.retry_after)
+            return 0
+        except requests.RequestException:
+            self.stderr.write('Failed to connect to GitHub GraphQL API')
+            self.connection_failed()
+            return 0
+        self.connection_errors = 0
+
+        refreshed = 0
+        for project in batch:
+            status_code, repo_data = results[project.full_name]
+            if self.apply(project, status_code, repo_data):
+                refreshed += 1
+        return refreshed
+
+    def refresh_project(self, project):
+        owner, _, repo = project.full_name.partition('/')
+        try:
+            response = github_client.fetch_repo(owner, repo)
+        except ratelimit.RateLimitExceeded as exc:
+            # Other workers drained the shared budget; wait for the reset
+            self.stdout.write(f'Rate limit budget exhausted, sleeping {exc.retry_after}s until reset')
+            time.sleep(exc.retry_after)
+            return False
+        except requests.RequestException:
+            self.stderr.write(f'{project.full_name}: failed to connect to GitHub API')
+            self.connection_failed()
+            return False
+        self.connection_errors = 0
+
+        repo_data = response.json() if response.status_code == 200 else None
+        return self.apply(project, response.status_code, repo_data)
+
+    def apply(self, project, status_code, repo_data):
+        if status_code != 200:
+            self.stderr.write(f'{project.full_name}: GitHub API returned status {status_code}')
+            # Push it to the back of the queue rather than retrying it every pass
+            project.last_synced_at = timezone.now()
+            project.save(update_fields=['last_synced_at'])
+            return False
+
+        for field, value in project_fields_from_github(repo_data).items():
+            setattr(project, field, value)
+        try:
+            # A renamed repository brings a new full_name, which may already be tracked
+            project.save(update_fields=['full_name'] + UPSERT_UPDATE_FIELDS)
+        except IntegrityError:
+            self.stderr.write(f'{project.full_name}: already tracked by another project')
+            Project.objects.filter(pk=project.pk).update(last_synced_at=timezone.now())
+            return False
+        record_star_snapshots([project])
+        return True
+
+    def connection_failed(self):
+        # Back off like a failed job, so an outage isn't a hot loop of requests
+        self.connection_errors += 1
+        delay = jobs.backoff(self.connection_errors)
+        self.stdout.write(f'GitHub unreachable, retrying in {delay:.0f}s')
+        time.sleep(delay)
+
+    def budget_spacing(self, reserve):
+        status = github_client.rate_limit_status()
+        if status['remaining'] is None or status['reset'] is None:
+            return 0
+        available = status['remaining'] - reserve
+        window = status['reset'] - time.time()
+        if available <= 0 or window <= 0:
+            return 0
+        return window / available
+
+    def wait_for_budget(self, reserve):
+        status = github_client.rate_limit_status()
+        if status['remaining'] is None or status['reset'] is None:
+            return
+        if status['remaining'] > reserve:
+            return
+
+        wait = status['reset'] - time.time() + 1
+        if wait > 0:
+            self.stdout.write(f'Rate limit budget exhausted, sleeping {int(wait)}s until reset')
+            time.sleep(wait)
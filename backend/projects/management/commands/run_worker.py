@@ -0,0 +1,106 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from projects import jobs, webhooks
+
+HOUSEKEEPING_INTERVAL = 60
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs; start as many of these as you like'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=int(os.getenv('JOB_WORKER_CONCURRENCY', '1')),
+                            help='Worker threads in this process (default: JOB_WORKER_CONCURRENCY or 1)')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds to wait when no job is due (default: 1)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Jobs claimed at once by each thread (default: a GraphQL batch '
+                                 'when GraphQL is in use, else 1)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no job is due instead of waiting for more')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        batch_size = options['batch_size'] or jobs.claim_batch_size()
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping after the current jobs...')
+            stop.set()
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        # Jobs held by a worker that died are handed out again first
+        self.housekeeping()
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        threads = [
+            threading.Thread(
+                target=self.work, name=f'{prefix}:{i}', daemon=True,
+                args=(stop, batch_size, options['poll'], options['once']),
+            )
+            for i in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {len(threads)} worker thread(s), claiming up to {batch_size} job(s) each")
+
+        last_housekeeping = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+            if time.monotonic() - last_housekeeping >= HOUSEKEEPING_INTERVAL:
+                self.housekeeping()
+                last_housekeeping = time.monotonic()
+
+    def housekeeping(self):
+        try:
+            requeued = jobs.requeue_expired()
+            pruned = jobs.prune_finished()
+            # Webhook deliveries stored by a web worker that went away before flushing
+            applied = webhooks.flush_pending()
+        except Exception:
+            logger.exception('Job housekeeping failed')
+            return
+        finally:
+            close_old_connections()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} job(s) whose worker went away')
+        if pruned:
+            self.stdout.write(f'Pruned {pruned} finished job(s)')
+        if applied:
+            self.stdout.write(f'Applied pending webhook updates to {applied} project(s)')
+
+    def work(self, stop, batch_size, poll, once):
+        name = threading.current_thread().name
+        try:
+            while not stop.is_set():
+                # Long-lived threads must drop connections past CONN_MAX_AGE or broken ones
+                close_old_connections()
+                try:
+                    claimed = jobs.claim(name, batch_size)
+                    if claimed:
+                        statuses = jobs.run(claimed)
+                except Exception:
+                    logger.exception('Worker %s failed to run jobs', name)
+                    stop.wait(poll)
+                    continue
+
+                if not claimed:
+                    if once:
+                        break
+                    stop.wait(poll)
+                    continue
+                self.stdout.write(f"{name}: ran {len(claimed)} job(s), " + ', '.join(
+                    f'{count} {status}' for status, count in sorted(statuses.items())
+                ))
+        finally:
+            connections.close_all()
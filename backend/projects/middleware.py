@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import re
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from . import instrumentation
+
+try:
+    import brotli
+except ImportError:  # optional, CompressionMiddleware sticks to gzip without it
+    brotli = None
+
+logger = logging.getLogger('projects.performance')
+
+# Requests at least this slow are logged as warnings, the rest at INFO
+SLOW_REQUEST_MS = float(os.getenv('PERFORMANCE_SLOW_REQUEST_MS', '1000'))
+COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', '1024'))
+BROTLI_QUALITY = int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', '4'))
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+class PerformanceMiddleware:
+    """
+    Time each request and break it down into database, GitHub and render
+    time, reported as a Server-Timing header, one JSON log line on the
+    ``projects.performance`` logger and, optionally, Prometheus histograms
+    labelled with the URL name.
+
+    Works in both WSGI and ASGI deployments.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics, token = instrumentation.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = instrumentation.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        self.report(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that too
+        metrics = instrumentation.current()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_time += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, metrics):
+        elapsed = metrics.elapsed()
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unmatched'
+
+        timings = [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+            f'github;dur={metrics.github_time * 1000:.1f};desc="{metrics.github_calls} calls"',
+            f'render;dur={metrics.render_time * 1000:.1f}',
+            f'total;dur={elapsed * 1000:.1f}',
+        ]
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join([existing] + timings if existing else timings)
+
+        level = logging.WARNING if elapsed * 1000 >= SLOW_REQUEST_MS else logging.INFO
+        logger.log(level, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'total_ms': round(elapsed * 1000, 1),
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'db_queries': metrics.db_queries,
+            'github_ms': round(metrics.github_time * 1000, 1),
+            'github_calls': metrics.github_calls,
+            'render_ms': round(metrics.render_time * 1000, 1),
+        }))
+        instrumentation.observe(view, request.method, response.status_code, metrics, elapsed)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses of RESPONSE_COMPRESSION_MIN_SIZE bytes or more, with
+    brotli when the client accepts it and the package is installed, else
+    gzip. Enabled by RESPONSE_COMPRESSION=True.
+
+    Files are left alone: WhiteNoise serves static files precompressed.
+    """
+
+    def process_response(self, request, response):
+        if isinstance(response, FileResponse):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSION_MIN_SIZE:
+            return response
+        accepts_brotli = re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is None or response.streaming or not accepts_brotli or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # As GZipMiddleware does: the compressed body is only weakly equivalent
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
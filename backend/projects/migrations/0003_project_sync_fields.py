@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_improve_model_for_production'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='full_name',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='owner',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
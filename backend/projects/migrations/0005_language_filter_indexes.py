@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:50
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def create_language_trigram_index(apps, schema_editor):
+    # Postgres only: matches the UPPER(language::text) LIKE ... produced by icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS projects_language_trgm_idx '
+        'ON projects_project USING gin (UPPER(language::text) gin_trgm_ops)'
+    )
+
+
+def drop_language_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS projects_language_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(django.db.models.functions.text.Lower('language'), name='projects_language_lower_idx'),
+        ),
+        migrations.RunPython(create_language_trigram_index, drop_language_trigram_index),
+    ]
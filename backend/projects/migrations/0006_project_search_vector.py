@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:50
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# A trigger keeps search_vector in sync for every write path, including
+# bulk_create/bulk_update and queryset.update(), which skip model save().
+CREATE_SEARCH_TRIGGER = [
+    """
+    CREATE OR REPLACE FUNCTION projects_project_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER projects_project_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON projects_project
+    FOR EACH ROW EXECUTE FUNCTION projects_project_search_vector_update()
+    """,
+    # Backfill existing rows through the trigger
+    "UPDATE projects_project SET name = name",
+    "CREATE INDEX IF NOT EXISTS projects_search_vector_idx ON projects_project USING gin (search_vector)",
+]
+
+DROP_SEARCH_TRIGGER = [
+    "DROP INDEX IF EXISTS projects_search_vector_idx",
+    "DROP TRIGGER IF EXISTS projects_project_search_vector_trigger ON projects_project",
+    "DROP FUNCTION IF EXISTS projects_project_search_vector_update()",
+]
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in CREATE_SEARCH_TRIGGER:
+        schema_editor.execute(statement)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in DROP_SEARCH_TRIGGER:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_language_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_project_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-stars', '-id'], name='projects_stars_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_stars_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StarSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stars', models.PositiveIntegerField()),
+                ('captured_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='star_snapshots', to='projects.project')),
+            ],
+            options={
+                'ordering': ['-captured_at'],
+                'indexes': [models.Index(fields=['project', 'captured_at'], name='projects_snapshot_time_idx')],
+            },
+        ),
+    ]
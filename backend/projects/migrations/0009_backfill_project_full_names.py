@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:57
+
+from django.db import migrations
+from django.db.models import Count, F, Value
+from django.db.models.functions import Concat
+
+
+def backfill_full_names(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    StarSnapshot = apps.get_model('projects', 'StarSnapshot')
+
+    # Blank keys would collide under the unique constraint; NULLs never do
+    Project.objects.filter(full_name='').update(full_name=None)
+    Project.objects.filter(full_name__isnull=True).exclude(owner='').update(
+        full_name=Concat(F('owner'), Value('/'), F('name'))
+    )
+
+    # Rows saved more than once under the same owner/repo: keep the most
+    # recently synced one and move the others' star history onto it
+    duplicated = (
+        Project.objects.exclude(full_name__isnull=True)
+        .values('full_name').annotate(rows=Count('id')).filter(rows__gt=1)
+        .values_list('full_name', flat=True)
+    )
+    for full_name in list(duplicated):
+        rows = list(
+            Project.objects.filter(full_name=full_name)
+            .order_by(F('last_synced_at').desc(nulls_last=True), '-id')
+            .values_list('id', flat=True)
+        )
+        keep, drop = rows[0], rows[1:]
+        StarSnapshot.objects.filter(project_id__in=drop).update(project_id=keep)
+        Project.objects.filter(id__in=drop).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_star_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_full_names, migrations.RunPython.noop),
+    ]
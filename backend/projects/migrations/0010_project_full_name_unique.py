@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_backfill_project_full_names'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='full_name',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -1,17 +1,118 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
+# services.delete_projects removes star snapshots itself and then deletes
+# projects with a raw DELETE, which skips Django's cascades. A new model with a
+# foreign key to Project has to be cleaned up there too (a test checks this).
 class Project(models.Model):
     name = models.CharField(max_length=255, db_index=True)
+    owner = models.CharField(max_length=100, blank=True, default='')
+    # owner/repo as reported by GitHub; the natural key for upserts. NULL for
+    # projects entered by hand, which never conflict with each other.
+    full_name = models.CharField(max_length=255, blank=True, null=True, unique=True)
     description = models.TextField(blank=True)
     language = models.CharField(max_length=50, blank=True, null=True, db_index=True)
     stars = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_synced_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    # Maintained by a Postgres trigger (migration 0006); stays NULL on other databases
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['name', 'language'], name='projects_pr_name_7e608a_idx'),
+            # Backs the (created_at, id) keyset used by the list endpoint's cursor pagination
+            models.Index(fields=['-created_at', '-id'], name='projects_created_id_idx'),
+            # Top-N by stars on the dashboard stats endpoint
+            models.Index(fields=['-stars', '-id'], name='projects_stars_id_idx'),
+            # Case-insensitive language filtering, see filters.filter_by_language
+            models.Index(Lower('language'), name='projects_language_lower_idx'),
         ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class StarSnapshot(models.Model):
+    """Append-only star count history, one row per import or refresh."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='star_snapshots')
+    stars = models.PositiveIntegerField()
+    captured_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-captured_at']
+        indexes = [
+            models.Index(fields=['project', 'captured_at'], name='projects_snapshot_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}: {self.stars} @ {self.captured_at:%Y-%m-%d %H:%M}"
+
+
+class Job(models.Model):
+    """Background work claimed by ``manage.py run_worker``, see projects.jobs."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    kind = models.CharField(max_length=50)
+    # What the job is about, e.g. sync_repo:owner/repo; at most one active job per key
+    key = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # Not claimed before this time; pushed back on each retry
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True, default='')
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='projects_job_active_key_uniq',
+            ),
+        ]
+        indexes = [
+            # The queue itself: due jobs in claim order
+            models.Index(fields=['run_after', 'id'], condition=models.Q(status='queued'),
+                         name='projects_job_due_idx'),
+            # Running jobs whose worker went away, see jobs.requeue_expired
+            models.Index(fields=['locked_at'], condition=models.Q(status='running'),
+                         name='projects_job_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.key} ({self.status})"
+
+
+class WebhookUpdate(models.Model):
+    """A webhook delivery waiting to be applied, one row per project, see projects.webhooks."""
+    # The full_name the project is stored under
+    full_name = models.CharField(max_length=255, unique=True)
+    # Its name in the latest delivery; differs while a rename is pending
+    repo_full_name = models.CharField(max_length=255, db_index=True)
+    fields = models.JSONField()
+    received_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.full_name} @ {self.received_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProjectCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), so each page is an index range
+    scan regardless of how deep the client has paged.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+
+
+class ProjectSearchPagination(PageNumberPagination):
+    """Search results are ordered by rank, which a fixed cursor cannot follow."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,206 @@
+"""
+GitHub rate-limit governor, shared by every worker process given a shared cache.
+
+The X-RateLimit-* headers of each response are written to the default cache
+per (token, resource), and each outgoing call first reserves one request
+from that budget with the cache's ``decr``. With Redis or Memcached as the
+default cache, ``decr`` is atomic and all gunicorn workers draw from the
+same budget, stopping before GitHub starts refusing them. The out-of-the-box
+LocMemCache keeps a budget per process: each one still stops at the limit
+GitHub last reported to it, but doesn't see the calls of the others. The
+database cache is shared but its ``decr`` is a read followed by a write, so
+concurrent calls can overdraw the budget slightly.
+
+Several tokens can be pooled through GITHUB_TOKENS (comma separated) to
+raise aggregate throughput; calls go to the token with the most requests
+left, or rotate through them with GITHUB_TOKEN_STRATEGY=round_robin.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+GITHUB_TOKENS = [
+    token.strip()
+    for token in os.getenv("GITHUB_TOKENS", os.getenv("GITHUB_TOKEN", "")).split(",")
+    if token.strip()
+] or [None]  # anonymous access still has a (small) budget of its own
+TOKEN_STRATEGY = os.getenv("GITHUB_TOKEN_STRATEGY", "least_used")
+
+# Requests per token left untouched, and how long a call may wait for the
+# budget to reset before giving up with RateLimitExceeded
+RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "0"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "0"))
+
+DEFAULT_RESOURCE = "core"
+KEY_PREFIX = "github:ratelimit"
+
+
+class RateLimitExceeded(Exception):
+    """Every token is out of budget; ``retry_after`` is in seconds."""
+
+    def __init__(self, retry_after):
+        self.retry_after = max(int(retry_after), 1)
+        super().__init__(f"GitHub rate limit exhausted, retry in {self.retry_after}s")
+
+
+def auth_headers(token):
+    return {"Authorization": f"token {token}"} if token else {}
+
+
+def _token_id(token):
+    # Tokens never end up in cache keys, only a digest of them
+    if token is None:
+        return "anonymous"
+    return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+def _key(token, resource, field):
+    return f"{KEY_PREFIX}:{_token_id(token)}:{resource}:{field}"
+
+
+def _budget(token, resource):
+    fields = ("limit", "remaining", "reset")
+    values = cache.get_many([_key(token, resource, field) for field in fields])
+    return {field: values.get(_key(token, resource, field)) for field in fields}
+
+
+def _candidates(resource):
+    budgets = [(token, _budget(token, resource)) for token in GITHUB_TOKENS]
+    if TOKEN_STRATEGY == "round_robin" and len(budgets) > 1:
+        key = f"{KEY_PREFIX}:cursor"
+        cache.add(key, 0, timeout=None)
+        start = cache.incr(key) % len(budgets)
+        return budgets[start:] + budgets[:start]
+
+    # Least used first; a token with no recorded budget counts as unused
+    def left(item):
+        remaining = item[1]["remaining"]
+        return float("inf") if remaining is None else remaining
+    return sorted(budgets, key=left, reverse=True)
+
+
+def _reserve(resource):
+    """Reserve one request; returns (token, 0) or (None, seconds to wait)."""
+    now = time.time()
+    candidates = _candidates(resource)
+
+    for token, budget in candidates:
+        if budget["remaining"] is None or budget["reset"] is None or budget["reset"] <= now:
+            return token, 0
+        try:
+            remaining = cache.decr(_key(token, resource, "remaining"))
+        except ValueError:
+            # Expired between the read and the decrement: a fresh window
+            return token, 0
+        if remaining >= RATE_LIMIT_RESERVE:
+            return token, 0
+
+    return None, min(budget["reset"] - now for _, budget in candidates)
+
+
+def acquire(resource=DEFAULT_RESOURCE, max_wait=None):
+    """
+    Pick a token for one call to ``resource``, reserving it from the budget.
+
+    Sleeps for a reset that is due within ``max_wait`` seconds (default
+    GITHUB_RATE_LIMIT_MAX_WAIT), otherwise raises RateLimitExceeded.
+    """
+    max_wait = RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+    deadline = time.monotonic() + max_wait
+    while True:
+        token, wait = _reserve(resource)
+        if not wait:
+            return token
+        if time.monotonic() + wait > deadline:
+            raise RateLimitExceeded(wait)
+        time.sleep(wait)
+
+
+async def aacquire(resource=DEFAULT_RESOURCE, max_wait=None):
+    """Async counterpart of ``acquire``."""
+    max_wait = RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+    deadline = time.monotonic() + max_wait
+    while True:
+        token, wait = await sync_to_async(_reserve, thread_sensitive=False)(resource)
+        if not wait:
+            return token
+        if time.monotonic() + wait > deadline:
+            raise RateLimitExceeded(wait)
+        await asyncio.sleep(wait)
+
+
+def _header_int(headers, name):
+    value = headers.get(name)
+    return int(value) if value is not None and value.isdigit() else None
+
+
+def is_rate_limited(status_code, headers):
+    """Whether GitHub refused a call because of a primary or secondary limit."""
+    if status_code not in (403, 429):
+        return False
+    return _header_int(headers, "X-RateLimit-Remaining") == 0 or "Retry-After" in headers
+
+
+def retry_after(headers):
+    """Seconds until a refused call may be retried, per GitHub's headers."""
+    seconds = _header_int(headers, "Retry-After")
+    if seconds is not None:
+        return seconds
+    reset = _header_int(headers, "X-RateLimit-Reset")
+    return reset - time.time() if reset is not None else 60
+
+
+def record(token, status_code, headers):
+    """Store the budget GitHub reported for ``token`` with a response."""
+    resource = headers.get("X-RateLimit-Resource", DEFAULT_RESOURCE)
+    limit = _header_int(headers, "X-RateLimit-Limit")
+    remaining = _header_int(headers, "X-RateLimit-Remaining")
+    reset = _header_int(headers, "X-RateLimit-Reset")
+
+    if is_rate_limited(status_code, headers):
+        # Secondary limits only send Retry-After; treat them as an empty budget
+        remaining = 0
+        reset = max(reset or 0, int(time.time() + retry_after(headers)))
+    if remaining is None or reset is None:
+        return
+    _store(token, resource, limit, remaining, reset)
+
+
+def exhaust(token, resource, seconds):
+    """Mark ``token`` as out of budget for ``resource`` for ``seconds``."""
+    _store(token, resource, None, 0, int(time.time() + seconds))
+
+
+def _store(token, resource, limit, remaining, reset):
+    values = {
+        _key(token, resource, "remaining"): remaining,
+        _key(token, resource, "reset"): reset,
+    }
+    if limit is not None:
+        values[_key(token, resource, "limit")] = limit
+    # Kept a little past the reset so stale budgets age out on their own
+    cache.set_many(values, timeout=max(int(reset - time.time()), 0) + 60)
+
+
+async def arecord(token, status_code, headers):
+    await sync_to_async(record, thread_sensitive=False)(token, status_code, headers)
+
+
+def status(resource=DEFAULT_RESOURCE):
+    """
+    The budget left across all tokens: summed limit and remaining, and the
+    latest reset. Values stay None until GitHub has reported on a token.
+    """
+    budgets = [_budget(token, resource) for token in GITHUB_TOKENS]
+    known = [budget for budget in budgets if budget["remaining"] is not None and budget["reset"] is not None]
+    if not known:
+        return {"limit": None, "remaining": None, "reset": None, "tokens": len(budgets)}
+    return {
+        "limit": sum(budget["limit"] or 0 for budget in known) or None,
+        "remaining": sum(max(budget["remaining"], 0) for budget in known),
+        "reset": max(budget["reset"] for budget in known),
+        "tokens": len(budgets),
+    }
@@ -0,0 +1,108 @@
+import csv
+import json
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional, FastJSONRenderer falls back to JSONRenderer
+    orjson = None
+
+# Rows are flushed to the client in groups to keep per-chunk overhead low
+STREAM_BATCH_ROWS = 500
+
+
+class _LineBuffer:
+    """File-like sink that hands back whatever csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+# The list API's datetime format (DRF's: ISO 8601, microseconds, UTC as Z),
+# so exports in every format match it
+_datetime_field = DateTimeField()
+
+
+def _export_row(row):
+    return [
+        _datetime_field.to_representation(value) if isinstance(value, datetime) else value
+        for value in row
+    ]
+
+
+def _batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= STREAM_BATCH_ROWS:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for non-streamed payloads such as error responses
+        if data is None:
+            return b''
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        return ''.join(self.stream(list(data), [list(data.values())])).encode(self.charset)
+
+    def stream(self, header, rows):
+        writer = csv.writer(_LineBuffer())
+
+        def lines():
+            yield writer.writerow(header)
+            for row in rows:
+                yield writer.writerow(_export_row(row))
+
+        return _batched(lines())
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, cls=DjangoJSONEncoder) + '\n').encode(self.charset)
+
+    def stream(self, header, rows):
+        return _batched(
+            json.dumps(dict(zip(header, _export_row(row))), cls=DjangoJSONEncoder) + '\n'
+            for row in rows
+        )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer's output, byte for byte, encoded by orjson when installed.
+
+    Datetimes are written the way DRF writes them (ISO 8601, UTC as ``Z``),
+    so rows read with values() render exactly like serializer output.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        # orjson only writes compact UTF-8, DRF's default
+        if orjson is None or data is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+        # Escaped by JSONRenderer so the output is also valid JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
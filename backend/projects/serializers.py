@@ -1,8 +1,106 @@
+import os
 from rest_framework import serializers
-from .models import Project
+from .filters import split_param
+from .models import Job, Project
+
+BULK_MAX_IDS = int(os.getenv("PROJECT_BULK_MAX_IDS", "10000"))
+
+def requested_fields(request):
+    """Parse the ``?fields=a,b`` sparse fieldset parameter of a read request."""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(',') if name.strip()]
+
 
 class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
-        fields = '__all__'
-        read_only_fields = ('id', 'created_at')
\ No newline at end of file
+        exclude = ('search_vector',)
+        read_only_fields = ('id', 'created_at', 'last_synced_at')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'))
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def validate_full_name(self, value):
+        # Stored as NULL when blank so hand-entered projects never collide on it
+        return value or None
+
+
+class ProjectImportSerializer(ProjectSerializer):
+    """
+    ProjectSerializer's field rules for bulk imports, minus any per-row
+    uniqueness queries; conflicts are resolved by the upsert itself.
+    """
+    class Meta(ProjectSerializer.Meta):
+        validators = []
+        extra_kwargs = {'full_name': {'validators': []}}
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'kind', 'key', 'payload', 'status', 'attempts', 'max_attempts', 'run_after',
+            'last_error', 'result', 'created_at', 'updated_at', 'finished_at',
+        )
+        read_only_fields = fields
+
+
+class ProjectFilterSerializer(serializers.Serializer):
+    """Criteria selecting projects for a bulk operation, see filters.select_projects."""
+    language = serializers.CharField(required=False)
+    stars_below = serializers.IntegerField(required=False, min_value=0)
+    stars_above = serializers.IntegerField(required=False, min_value=0)
+    # Never-synced projects are included, as in refresh_projects
+    not_synced_since = serializers.DateTimeField(required=False)
+
+    def validate_language(self, value):
+        if not split_param(value):
+            raise serializers.ValidationError('Expected one or more comma-separated languages.')
+        return value
+
+    def validate(self, attrs):
+        # An empty filter would select every project
+        if not attrs:
+            raise serializers.ValidationError(
+                f"Expected at least one of: {', '.join(self.fields)}."
+            )
+        return attrs
+
+
+class ProjectSelectionSerializer(serializers.Serializer):
+    """The projects a bulk operation applies to: ``ids``, a ``filter``, or both."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=BULK_MAX_IDS,
+    )
+    filter = ProjectFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if 'ids' not in attrs and 'filter' not in attrs:
+            raise serializers.ValidationError("Expected 'ids', a 'filter', or both.")
+        return attrs
+
+
+class ProjectBulkValuesSerializer(serializers.ModelSerializer):
+    """Fields a bulk update may set; last_synced_at can be cleared to force a refresh."""
+    class Meta:
+        model = Project
+        fields = ('owner', 'description', 'language', 'last_synced_at')
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError(
+                f"Expected at least one of: {', '.join(self.Meta.fields)}."
+            )
+        return attrs
+
+
+class ProjectBulkUpdateSerializer(ProjectSelectionSerializer):
+    values = ProjectBulkValuesSerializer()
@@ -0,0 +1,231 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .caching import invalidate_project_caches
+from .models import Project, StarSnapshot
+
+UPSERT_CHUNK_SIZE = 500
+UPSERT_UPDATE_FIELDS = ['name', 'owner', 'description', 'language', 'stars', 'last_synced_at']
+
+
+def project_fields_from_github(repo_data):
+    """Map a GitHub repository payload onto Project field values."""
+    return {
+        'name': repo_data['name'],
+        'owner': (repo_data.get('owner') or {}).get('login', ''),
+        'full_name': repo_data.get('full_name'),
+        'description': repo_data.get('description') or '',
+        'language': repo_data.get('language'),
+        'stars': repo_data.get('stargazers_count', 0),
+        'last_synced_at': timezone.now(),
+    }
+
+
+def record_star_snapshots(projects):
+    """Append the current star count of each project to its history."""
+    captured_at = timezone.now()
+    StarSnapshot.objects.bulk_create([
+        StarSnapshot(project_id=project.pk, stars=project.stars, captured_at=captured_at)
+        for project in projects
+    ])
+
+
+def _chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def upsert_key(record):
+    """The key upsert_projects reports a record under: full_name, else name."""
+    return record.get('full_name') or record['name']
+
+
+def upsert_projects(records, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Insert or update projects, one transaction per chunk.
+
+    Records are dicts of Project field values; fields a record leaves out
+    keep their current value on update and their default on insert.
+
+    Records with a full_name are written as batched INSERT ... ON CONFLICT
+    (full_name) DO UPDATE statements, so concurrent imports of the same
+    repository cannot race. A project with no full_name yet and the same name
+    is adopted by such a record rather than duplicated. Records without a
+    full_name (hand-entered projects) are matched by name among the projects
+    that have no full_name either.
+    Returns a dict mapping upsert_key(record) -> (project, is_new).
+    """
+    # Later records win, mirroring repeated update_or_create calls
+    keyed, unkeyed = {}, {}
+    for record in records:
+        if record.get('full_name'):
+            keyed[record['full_name']] = record
+        else:
+            if 'full_name' in record:
+                record = dict(record, full_name=None)
+            unkeyed[record['name']] = record
+
+    results = {}
+    for chunk in _chunked(list(keyed.values()), chunk_size):
+        with transaction.atomic():
+            results.update(_upsert_on_full_name(chunk))
+    for chunk in _chunked(list(unkeyed.values()), chunk_size):
+        with transaction.atomic():
+            results.update(_upsert_on_name(chunk))
+
+    # Bulk writes bypass the post_save signal
+    if results:
+        invalidate_project_caches()
+    return results
+
+
+def upsert_project(fields):
+    """Insert or update a single project, see upsert_projects."""
+    return upsert_projects([fields])[upsert_key(fields)]
+
+
+def _claim_unkeyed(records):
+    """
+    Give projects saved before full_name existed the full_name of a record.
+
+    Such rows have no owner, so migration 0009 could not backfill them; they
+    are matched by name, as the old name-keyed import did, and at most one
+    row is claimed per record. Returns {full_name: created_at} of the claims.
+    """
+    candidates = defaultdict(list)
+    for project in (
+        Project.objects
+        .filter(full_name__isnull=True, name__in=[record['name'] for record in records])
+        .order_by(F('last_synced_at').desc(nulls_last=True), '-id')
+    ):
+        candidates[project.name].append(project)
+
+    claimed = {}
+    for record in records:
+        owner = record.get('owner') or record['full_name'].partition('/')[0]
+        for project in candidates[record['name']]:
+            if project.owner not in ('', owner):
+                continue
+            candidates[record['name']].remove(project)
+            try:
+                with transaction.atomic():
+                    # Another import may have claimed the row since it was read
+                    adopted = Project.objects.filter(pk=project.pk, full_name__isnull=True).update(
+                        full_name=record['full_name'], owner=owner,
+                    )
+            except IntegrityError:
+                # ... or inserted this full_name, which the upsert then updates
+                break
+            if adopted:
+                claimed[record['full_name']] = project.created_at
+                break
+    return claimed
+
+
+def _upsert_on_full_name(chunk):
+    # Only used to report imported vs updated; the write itself is atomic
+    existing = dict(
+        Project.objects
+        .filter(full_name__in=[record['full_name'] for record in chunk])
+        .values_list('full_name', 'created_at')
+    )
+    missing = [record for record in chunk if record['full_name'] not in existing]
+    if missing:
+        existing.update(_claim_unkeyed(missing))
+    results = {}
+
+    # ON CONFLICT updates the same columns for every row of a statement, so
+    # records are batched by the fields they carry
+    groups = defaultdict(list)
+    for record in chunk:
+        groups[frozenset(record)].append(record)
+
+    for fields, group in groups.items():
+        projects = [Project(**record) for record in group]
+        Project.objects.bulk_create(
+            projects,
+            update_conflicts=True,
+            unique_fields=['full_name'],
+            update_fields=[field for field in UPSERT_UPDATE_FIELDS if field in fields],
+        )
+
+        for project in projects:
+            is_new = project.full_name not in existing
+            if not is_new:
+                project.created_at = existing[project.full_name]
+            results[project.full_name] = (project, is_new)
+
+        record_star_snapshots([
+            project for project in projects
+            if 'stars' in fields or results[project.full_name][1]
+        ])
+
+    return results
+
+
+def _upsert_on_name(chunk):
+    existing = {
+        project.name: project
+        for project in Project.objects.filter(
+            full_name__isnull=True, name__in=[record['name'] for record in chunk]
+        )
+    }
+    to_create, to_update = [], []
+    results = {}
+
+    for record in chunk:
+        project = existing.get(record['name'])
+        if project is None:
+            project = Project(**record)
+            to_create.append(project)
+            results[record['name']] = (project, True)
+        else:
+            for field in UPSERT_UPDATE_FIELDS:
+                if field in record:
+                    setattr(project, field, record[field])
+            to_update.append(project)
+            results[record['name']] = (project, False)
+
+    if to_create:
+        Project.objects.bulk_create(to_create)
+    if to_update:
+        # Only overwrite columns the records actually carry
+        present = set().union(*chunk)
+        update_fields = [field for field in UPSERT_UPDATE_FIELDS if field in present]
+        if update_fields:
+            Project.objects.bulk_update(to_update, update_fields)
+    record_star_snapshots(to_create + to_update)
+    return results
+
+
+def delete_projects(queryset):
+    """
+    Delete the projects in ``queryset`` and their star history.
+
+    Two set-based DELETEs in one transaction, snapshots first. Returns
+    (projects deleted, snapshots deleted).
+    """
+    with transaction.atomic():
+        snapshots, _ = StarSnapshot.objects.filter(project__in=queryset).delete()
+        # QuerySet.delete() would load every project to send post_delete.
+        # The raw DELETE skips cascades: snapshots are the only rows pointing
+        # at projects (see the note on Project), and caches are invalidated below.
+        # _raw_delete(using) is private API, checked against Django 5.2, where
+        # it returns the row count; BulkProjectTests covers it on upgrades
+        deleted = queryset._raw_delete(queryset.db)
+
+    if deleted:
+        invalidate_project_caches()
+    return deleted, snapshots
+
+
+def update_projects(queryset, values):
+    """Set ``values`` on every project in ``queryset`` with one UPDATE; returns the row count."""
+    with transaction.atomic():
+        updated = queryset.update(**values)
+
+    # Bulk writes bypass the post_save signal
+    if updated:
+        invalidate_project_caches()
+    return updated
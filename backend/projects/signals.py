@@ -0,0 +1,19 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import instrumentation
+from .caching import invalidate_project_caches
+from .models import Project
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate_project_caches(pk=instance.pk)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Fires on every (re)connect of a connection object; install only once
+    if instrumentation.time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(instrumentation.time_query)
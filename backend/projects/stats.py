@@ -0,0 +1,100 @@
+import os
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, OuterRef, RowRange, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, FirstValue, LastValue, RowNumber
+from django.utils import timezone
+from .caching import projects_generation
+from .models import Project, StarSnapshot
+
+STATS_CACHE_TTL = int(os.getenv("PROJECT_STATS_CACHE_TTL", "3600"))
+PROJECT_SUMMARY_FIELDS = ('id', 'name', 'full_name', 'language', 'stars', 'created_at')
+
+
+def compute_dashboard_stats(top=10, recent=10):
+    # One grouped aggregate; the overall totals are folded from its rows
+    languages = list(
+        Project.objects
+        .values('language')
+        .annotate(count=Count('id'), total_stars=Sum('stars'), average_stars=Avg('stars'))
+        .order_by('-count', 'language')
+    )
+    total_projects = sum(row['count'] for row in languages)
+    total_stars = sum(row['total_stars'] or 0 for row in languages)
+
+    for row in languages:
+        row['average_stars'] = round(row['average_stars'] or 0, 2)
+
+    return {
+        "total_projects": total_projects,
+        "total_stars": total_stars,
+        "average_stars": round(total_stars / total_projects, 2) if total_projects else 0,
+        "language_count": sum(1 for row in languages if row['language']),
+        "languages": languages,
+        "top_starred": list(
+            Project.objects.order_by('-stars', '-id').values(*PROJECT_SUMMARY_FIELDS)[:top]
+        ),
+        "recently_added": list(
+            Project.objects.order_by('-created_at', '-id').values(*PROJECT_SUMMARY_FIELDS)[:recent]
+        ),
+    }
+
+
+def get_dashboard_stats(top=10, recent=10):
+    key = f'projects:stats:{projects_generation()}:{top}:{recent}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats(top, recent)
+        cache.set(key, stats, STATS_CACHE_TTL)
+    return stats
+
+
+def star_growth(days=7, limit=20):
+    """
+    Rank projects by stars gained over the last ``days`` days.
+
+    Growth is measured from the last snapshot taken at or before the start
+    of the window, or the first one inside it for projects tracked since,
+    to the latest one. The snapshots are picked with window functions and
+    ranked in the database, so only the top ``limit`` rows come back.
+    """
+    since = timezone.now() - timedelta(days=days)
+    per_project = {
+        'partition_by': [F('project_id')],
+        'order_by': F('captured_at').asc(),
+        'frame': RowRange(start=None, end=None),
+    }
+    baseline = (
+        StarSnapshot.objects
+        .filter(project_id=OuterRef('project_id'), captured_at__lte=since)
+        .order_by('-captured_at')
+        .values('stars')[:1]
+    )
+    ranked = list(
+        StarSnapshot.objects
+        .filter(captured_at__gt=since)
+        .annotate(
+            stars_before=Coalesce(Subquery(baseline), Window(FirstValue('stars'), **per_project)),
+            stars_after=Window(LastValue('stars'), **per_project),
+            position=Window(RowNumber(), partition_by=[F('project_id')], order_by=F('captured_at').desc()),
+        )
+        .annotate(gained=F('stars_after') - F('stars_before'))
+        .filter(position=1)
+        .order_by('-gained', 'project_id')
+        .values('project_id', 'stars_before', 'stars_after', 'gained')[:limit]
+    )
+
+    projects = Project.objects.in_bulk([row['project_id'] for row in ranked])
+    return [
+        {
+            "id": row['project_id'],
+            "name": projects[row['project_id']].name,
+            "full_name": projects[row['project_id']].full_name,
+            "language": projects[row['project_id']].language,
+            "stars_before": row['stars_before'],
+            "stars_after": row['stars_after'],
+            "gained": row['gained'],
+        }
+        for row in ranked
+        if row['project_id'] in projects
+    ]
@@ -1,3 +1,814 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+import requests
+from rest_framework.fields import DateTimeField
+from . import github_client, instrumentation, jobs, ratelimit, webhooks
+from .fake_github import fake_repo
+from .models import Job, Project, StarSnapshot, WebhookUpdate
+from .services import upsert_project, upsert_projects
 
-# Create your tests here.
+
+def github_record(owner, name, **fields):
+    return {'name': name, 'owner': owner, 'full_name': f'{owner}/{name}', **fields}
+
+
+class UpsertProjectsTests(TestCase):
+    def test_inserts_then_updates_on_full_name(self):
+        project, is_new = upsert_project(github_record('foo', 'utils', stars=5, language='Go'))
+        self.assertTrue(is_new)
+
+        project, is_new = upsert_project(github_record('foo', 'utils', stars=7, language='Rust'))
+        self.assertFalse(is_new)
+        project = Project.objects.get()
+        self.assertEqual((project.stars, project.language), (7, 'Rust'))
+        self.assertEqual(list(project.star_snapshots.order_by('id').values_list('stars', flat=True)), [5, 7])
+
+    def test_partial_record_keeps_other_fields(self):
+        upsert_project(github_record('foo', 'utils', description='Helpers', language='Go', stars=5))
+        upsert_project({'name': 'utils', 'full_name': 'foo/utils', 'language': 'Rust'})
+
+        project = Project.objects.get()
+        self.assertEqual((project.description, project.language, project.stars), ('Helpers', 'Rust', 5))
+        # No new star count, no new snapshot
+        self.assertEqual(project.star_snapshots.count(), 1)
+
+    def test_same_name_under_different_owners(self):
+        results = upsert_projects([github_record('foo', 'utils'), github_record('bar', 'utils')])
+
+        self.assertTrue(all(is_new for _, is_new in results.values()))
+        self.assertEqual(
+            sorted(Project.objects.values_list('full_name', flat=True)), ['bar/utils', 'foo/utils']
+        )
+
+    def test_adopts_project_saved_without_full_name(self):
+        legacy = Project.objects.create(name='utils', stars=1)
+
+        project, is_new = upsert_project(github_record('foo', 'utils', stars=9))
+
+        self.assertFalse(is_new)
+        self.assertEqual(project.pk, legacy.pk)
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.full_name, legacy.owner, legacy.stars), ('foo/utils', 'foo', 9))
+        self.assertEqual(Project.objects.count(), 1)
+
+    def test_adopts_one_legacy_row_per_record(self):
+        legacy = Project.objects.create(name='utils')
+
+        results = upsert_projects([github_record('foo', 'utils'), github_record('bar', 'utils')])
+
+        self.assertEqual(results['foo/utils'], (Project.objects.get(pk=legacy.pk), False))
+        self.assertTrue(results['bar/utils'][1])
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_does_not_adopt_legacy_row_of_another_owner(self):
+        Project.objects.create(name='utils', owner='bar')
+
+        project, is_new = upsert_project(github_record('foo', 'utils'))
+
+        self.assertTrue(is_new)
+        self.assertEqual(Project.objects.filter(full_name__isnull=True).count(), 1)
+
+    def test_record_without_full_name_matches_on_name(self):
+        upsert_project({'name': 'notes', 'stars': 1})
+        project, is_new = upsert_project({'name': 'notes', 'full_name': '', 'stars': 2})
+
+        self.assertFalse(is_new)
+        self.assertIsNone(project.full_name)
+        self.assertEqual(Project.objects.get().stars, 2)
+
+
+class BackfillFullNamesMigrationTests(TransactionTestCase):
+    before = [('projects', '0008_star_snapshot')]
+    after = [('projects', '0009_backfill_project_full_names')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        OldProject = apps.get_model('projects', 'Project')
+        OldSnapshot = apps.get_model('projects', 'StarSnapshot')
+
+        self.older = OldProject.objects.create(name='utils', owner='foo', full_name='')
+        self.newer = OldProject.objects.create(name='utils', owner='foo', full_name='foo/utils')
+        OldProject.objects.filter(pk=self.newer.pk).update(last_synced_at='2026-01-01T00:00:00Z')
+        self.unowned = OldProject.objects.create(name='notes', full_name='')
+        OldSnapshot.objects.create(project_id=self.older.pk, stars=1)
+        OldSnapshot.objects.create(project_id=self.newer.pk, stars=2)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfills_and_merges_duplicates(self):
+        rows = dict(Project.objects.values_list('id', 'full_name'))
+        # Both foo/utils rows merged into the most recently synced one
+        self.assertEqual(rows, {self.newer.pk: 'foo/utils', self.unowned.pk: None})
+        self.assertEqual(
+            sorted(StarSnapshot.objects.filter(project_id=self.newer.pk).values_list('stars', flat=True)), [1, 2]
+        )
+
+
+class AsyncClientTests(TestCase):
+    def test_clients_of_closed_loops_are_dropped(self):
+        async def get_client():
+            return github_client.get_async_client()
+
+        clients = [asyncio.run(get_client()) for _ in range(5)]
+
+        # WSGI runs each async view in a fresh loop; at most the last one's client is kept
+        self.assertEqual(len({id(client) for client in clients}), 5)
+        self.assertLessEqual(len(github_client._async_clients), 1)
+
+    def test_one_client_per_running_loop(self):
+        async def get_clients():
+            return github_client.get_async_client(), github_client.get_async_client()
+
+        first, second = asyncio.run(get_clients())
+        self.assertIs(first, second)
+
+
+class GithubSessionTests(TestCase):
+    def test_only_server_errors_are_retried(self):
+        retry = github_client._build_session().get_adapter(github_client.GITHUB_API_URL).max_retries
+
+        for status in (500, 502, 503, 504):
+            self.assertTrue(retry.is_retry('GET', status, has_retry_after=True), status)
+        # Rate limits come back to github_get instead of sleeping in urllib3
+        for status in (403, 429):
+            self.assertFalse(retry.is_retry('GET', status, has_retry_after=True), status)
+
+
+class SaveGithubRepoAsyncTests(TestCase):
+    def test_created_at_matches_the_sync_view(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin)
+        response = github_client.CachedResponse(fake_repo('foo', 'utils'), {})
+
+        with mock.patch.object(github_client, 'afetch_repo', mock.AsyncMock(return_value=response)):
+            body = self.client.post(
+                reverse('save-github-repo-async', args=['foo', 'utils']), secure=True
+            ).json()
+
+        project = Project.objects.get()
+        self.assertEqual(body['project']['created_at'], DateTimeField().to_representation(project.created_at))
+
+
+def star_event(owner, name, stars, **payload):
+    return {'action': 'created', 'repository': {**fake_repo(owner, name), 'stargazers_count': stars}, **payload}
+
+
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name='utils', owner='foo', full_name='foo/utils', stars=1)
+
+    def test_deliveries_are_stored_and_coalesced_until_flushed(self):
+        buffer = webhooks.WebhookBuffer(interval=60)
+        buffer.add(star_event('foo', 'utils', 2))
+        buffer.add(star_event('foo', 'utils', 3))
+
+        update = WebhookUpdate.objects.get()
+        self.assertEqual((update.full_name, update.fields['stars']), ('foo/utils', 3))
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.stars, 1)
+
+        self.assertEqual(buffer.flush(), 1)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.stars, 3)
+        self.assertEqual(self.project.last_synced_at, update.received_at)
+        self.assertFalse(WebhookUpdate.objects.exists())
+
+    def test_any_process_applies_stored_deliveries(self):
+        # Stored by a worker that died before its flush
+        webhooks.store(star_event('foo', 'utils', 5))
+
+        self.assertEqual(webhooks.flush_pending(), 1)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.stars, 5)
+
+    def test_events_after_a_pending_rename_update_the_renamed_project(self):
+        webhooks.store({
+            'action': 'renamed',
+            'repository': fake_repo('foo', 'helpers'),
+            'changes': {'repository': {'name': {'from': 'utils'}}},
+        })
+        webhooks.store(star_event('foo', 'helpers', 9))
+
+        self.assertEqual(list(WebhookUpdate.objects.values_list('full_name', 'repo_full_name')),
+                         [('foo/utils', 'foo/helpers')])
+        webhooks.flush_pending()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.full_name, self.project.stars), ('foo/helpers', 9))
+
+    def test_rename_collision_drops_only_that_update(self):
+        Project.objects.create(name='taken', owner='foo', full_name='foo/taken')
+        other = Project.objects.create(name='other', owner='bar', full_name='bar/other', stars=1)
+        webhooks.store({
+            'action': 'renamed',
+            'repository': fake_repo('foo', 'taken'),
+            'changes': {'repository': {'name': {'from': 'utils'}}},
+        })
+        webhooks.store(star_event('bar', 'other', 50))
+
+        with self.assertLogs('projects.webhooks', 'WARNING'):
+            self.assertEqual(webhooks.flush_pending(), 1)
+
+        other.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(other.stars, 50)
+        self.assertEqual(other.star_snapshots.count(), 1)
+        self.assertEqual(self.project.full_name, 'foo/utils')
+        self.assertFalse(WebhookUpdate.objects.exists())
+
+    def test_untracked_repositories_are_ignored(self):
+        webhooks.store(star_event('bar', 'other', 5))
+
+        self.assertEqual(webhooks.flush_pending(), 0)
+        self.assertFalse(WebhookUpdate.objects.exists())
+        self.assertEqual(Project.objects.count(), 1)
+
+
+class ProjectAdminOrderingTests(TestCase):
+    def setUp(self):
+        self.model_admin = admin.site._registry[Project]
+
+    def get_ordering(self, **params):
+        return self.model_admin.get_ordering(RequestFactory().get('/admin/projects/project/', params))
+
+    def test_search_keeps_rank_ordering_on_postgres(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertEqual(self.get_ordering(q='web framework')[0], '-search_rank')
+            self.assertEqual(self.get_ordering(), ('-stars', '-created_at'))
+
+    def test_default_ordering_without_ranked_search(self):
+        self.assertEqual(self.get_ordering(q='web framework'), ('-stars', '-created_at'))
+
+
+class ExportTests(TestCase):
+    def test_datetimes_match_the_list_api_in_every_format(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin_user)
+        project = Project.objects.create(name='utils', full_name='foo/utils')
+        Project.objects.filter(pk=project.pk).update(last_synced_at='2026-05-04T03:02:01.123456Z')
+
+        listed = self.client.get('/api/projects/', secure=True).json()['results'][0]
+        csv_rows = b''.join(self.client.get('/api/projects/export/?format=csv', secure=True)).decode().splitlines()
+        ndjson = b''.join(self.client.get('/api/projects/export/?format=ndjson', secure=True)).decode()
+
+        self.assertEqual(listed['last_synced_at'], '2026-05-04T03:02:01.123456Z')
+        exported = json.loads(ndjson.splitlines()[0])
+        csv_row = dict(zip(csv_rows[0].split(','), csv_rows[1].split(',')))
+        for field in ('created_at', 'last_synced_at'):
+            self.assertEqual(exported[field], listed[field])
+            self.assertEqual(csv_row[field], listed[field])
+
+
+class BulkProjectTests(TestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(admin_user)
+        now = timezone.now()
+        self.go_small = Project.objects.create(name='a', language='Go', stars=10, last_synced_at=now)
+        self.go_stale = Project.objects.create(name='b', language='go', stars=20, last_synced_at=now - timedelta(days=30))
+        self.go_never = Project.objects.create(name='c', language='Go', stars=500)
+        self.python = Project.objects.create(name='d', language='Python', stars=5)
+        for project in Project.objects.all():
+            StarSnapshot.objects.create(project=project, stars=project.stars)
+
+    def post(self, name, data):
+        return self.client.post(reverse(name), data, content_type='application/json', secure=True)
+
+    def remaining(self):
+        return set(Project.objects.values_list('name', flat=True))
+
+    def test_delete_by_filter(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.post('bulk-delete-projects', {'filter': {'language': 'go', 'not_synced_since': since}})
+
+        self.assertEqual(response.json(), {'deleted': 2, 'star_snapshots_deleted': 2})
+        self.assertEqual(self.remaining(), {'a', 'd'})
+        self.assertEqual(StarSnapshot.objects.count(), 2)
+
+    def test_delete_ids_and_filter_together(self):
+        ids = [self.go_small.pk, self.go_stale.pk, self.python.pk]
+        response = self.post('bulk-delete-projects', {'ids': ids, 'filter': {'stars_below': 15}})
+
+        self.assertEqual(response.json()['deleted'], 2)
+        self.assertEqual(self.remaining(), {'b', 'c'})
+
+    def test_rejects_an_empty_selection(self):
+        for data in ({}, {'filter': {}}, {'ids': []}, {'filter': {'language': ' , '}}):
+            self.assertEqual(self.post('bulk-delete-projects', data).status_code, 400, data)
+        self.assertEqual(Project.objects.count(), 4)
+
+    def test_update_sets_values_and_invalidates_cached_details(self):
+        detail = reverse('project-detail', args=[self.go_never.pk])
+        self.assertEqual(self.client.get(detail, secure=True).json()['language'], 'Go')
+
+        response = self.post('bulk-update-projects', {
+            'filter': {'language': 'Go', 'stars_above': 100},
+            'values': {'language': 'Zig', 'last_synced_at': None},
+        })
+
+        self.assertEqual(response.json(), {'updated': 1})
+        self.assertEqual(self.client.get(detail, secure=True).json()['language'], 'Zig')
+        self.assertEqual(Project.objects.filter(language='Zig').get().pk, self.go_never.pk)
+
+    def test_update_requires_values(self):
+        response = self.post('bulk-update-projects', {'ids': [self.python.pk], 'values': {'stars': 1}})
+        self.assertEqual(response.status_code, 400)
+
+    def test_star_snapshots_are_the_only_relation_to_projects(self):
+        # delete_projects deletes projects without Django's cascades
+        related = {relation.related_model for relation in Project._meta.related_objects}
+        self.assertEqual(related, {StarSnapshot})
+
+
+@mock.patch('projects.management.commands.refresh_projects.time.sleep')
+class RefreshProjectsTests(TestCase):
+    def setUp(self):
+        for name in ('a', 'b', 'c'):
+            Project.objects.create(name=name, owner='octo', full_name=f'octo/{name}')
+
+    def refresh(self, *args):
+        return call_command('refresh_projects', '--once', '--batch-size=2', *args,
+                            stdout=StringIO(), stderr=StringIO())
+
+    @mock.patch('projects.github_graphql.fetch_repos', side_effect=requests.ConnectionError)
+    def test_graphql_connection_errors_back_off_and_move_on(self, fetch_repos, sleep):
+        with self.assertRaisesMessage(CommandError, '3 projects could not be refreshed'):
+            self.refresh('--backend=graphql')
+
+        batches = [call.args[0] for call in fetch_repos.call_args_list]
+        self.assertEqual(batches, [['octo/a', 'octo/b'], ['octo/c']])
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertGreater(first, 0)
+        self.assertGreaterEqual(second, first)
+
+    @mock.patch('projects.github_client.fetch_repo')
+    def test_once_reports_failures_after_trying_each_project_once(self, fetch_repo, sleep):
+        fetch_repo.side_effect = [
+            mock.Mock(status_code=200, json=lambda: fake_repo('octo', 'a')),
+            requests.ConnectionError, mock.Mock(status_code=404),
+        ]
+
+        with self.assertRaisesMessage(CommandError, '2 projects could not be refreshed'):
+            self.refresh('--backend=rest', '--spread=0')
+
+        self.assertEqual(fetch_repo.call_count, 3)
+        self.assertEqual(Project.objects.get(name='a').stars, fake_repo('octo', 'a')['stargazers_count'])
+
+    @mock.patch('projects.jobs.backoff', side_effect=lambda failures: failures)
+    @mock.patch('projects.github_client.fetch_repo', return_value=mock.Mock(status_code=404))
+    def test_forever_backs_off_after_a_pass_where_everything_failed(self, fetch_repo, backoff, sleep):
+        class Stop(Exception):
+            pass
+        sleep.side_effect = [None, None, Stop]
+
+        with self.assertRaises(Stop):
+            call_command('refresh_projects', '--batch-size=2', '--backend=rest', '--spread=0',
+                         '--poll=60', stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(fetch_repo.call_count, 3)
+        # Both passes failed entirely, then nothing was left to pick
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1, 2, 60])
+
+
+class JobQueueTests(TestCase):
+    def test_a_claimed_job_is_not_handed_out_again(self):
+        for name in ('a', 'b', 'c'):
+            jobs.enqueue_repo(f'octo/{name}')
+
+        first = jobs.claim('one', limit=2)
+        second = jobs.claim('two', limit=2)
+
+        self.assertEqual([job.payload['full_name'] for job in first], ['octo/a', 'octo/b'])
+        self.assertEqual([job.payload['full_name'] for job in second], ['octo/c'])
+        self.assertEqual(jobs.claim('three', limit=2), [])
+        self.assertEqual({job.attempts for job in first + second}, {1})
+
+    def test_enqueueing_an_active_repo_returns_its_job(self):
+        job, created = jobs.enqueue_repo('octo/a')
+
+        self.assertTrue(created)
+        self.assertEqual(jobs.enqueue_repo('Octo/A'), (job, False))
+        queued = jobs.enqueue_repos(['octo/a', 'octo/b', 'OCTO/B'])
+        self.assertEqual(queued['octo/a'], (job, False))
+        self.assertTrue(queued['octo/b'][1])
+        self.assertFalse(queued['OCTO/B'][1])
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_enqueue_race_returns_the_other_job(self):
+        job, _ = jobs.enqueue_repo('octo/a')
+
+        # Another request queued it between the lookup and the insert
+        with mock.patch('django.db.models.query.QuerySet.first', return_value=None):
+            self.assertEqual(jobs.enqueue_repo('octo/a'), (job, False))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_one_active_job_per_key(self):
+        job, _ = jobs.enqueue_repo('octo/a')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind=job.kind, key=job.key)
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED)
+        self.assertTrue(jobs.enqueue_repo('octo/a')[1])
+
+    @mock.patch('projects.jobs.random.uniform', return_value=1)
+    def test_retries_back_off_until_out_of_attempts(self, uniform):
+        jobs.enqueue_repo('octo/a')
+        Job.objects.update(max_attempts=2)
+
+        job, = jobs.claim('one')
+        jobs.retry(job, 'boom')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.QUEUED, 'boom'))
+        self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), jobs.JOB_RETRY_BASE, delta=5)
+        self.assertEqual(jobs.claim('one'), [])
+
+        Job.objects.update(run_after=timezone.now())
+        job, = jobs.claim('one')
+        jobs.retry(job, 'boom again')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    @mock.patch('projects.jobs._fetch', side_effect=ratelimit.RateLimitExceeded(120))
+    def test_rate_limited_jobs_wait_for_the_reset_without_losing_an_attempt(self, fetch):
+        jobs.enqueue_repo('octo/a')
+
+        jobs.run(jobs.claim('one'))
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 0))
+        self.assertAlmostEqual((job.run_after - timezone.now()).total_seconds(), 120, delta=5)
+
+    def test_expired_leases_are_requeued_and_the_old_worker_is_ignored(self):
+        jobs.enqueue_repo('octo/a')
+        jobs.enqueue_repo('octo/b')
+        stuck, lost = jobs.claim('one', limit=2)
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=jobs.JOB_LEASE + 1))
+        Job.objects.filter(pk=lost.pk).update(max_attempts=1)
+
+        self.assertEqual(jobs.requeue_expired(), 1)
+
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {stuck.pk: Job.QUEUED, lost.pk: Job.FAILED})
+        self.assertFalse(jobs.complete(stuck, {}))
+        reclaimed, = jobs.claim('two')
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (stuck.pk, 2))
+        self.assertTrue(jobs.complete(reclaimed, {}))
+
+    def test_prune_keeps_recent_and_active_jobs(self):
+        old = timezone.now() - timedelta(days=jobs.JOB_RETENTION_DAYS + 1)
+        Job.objects.create(kind='k', key='old', status=Job.SUCCEEDED, finished_at=old)
+        Job.objects.create(kind='k', key='old-failed', status=Job.FAILED, finished_at=old)
+        Job.objects.create(kind='k', key='recent', status=Job.SUCCEEDED, finished_at=timezone.now())
+        Job.objects.create(kind='k', key='active')
+
+        self.assertEqual(jobs.prune_finished(), 2)
+        self.assertEqual(set(Job.objects.values_list('key', flat=True)), {'recent', 'active'})
+
+
+def github_response(status_code=200, payload=None, **headers):
+    return mock.Mock(status_code=status_code, headers=headers, json=lambda: payload)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'ratelimit-tests'}})
+@mock.patch.multiple('projects.ratelimit', GITHUB_TOKENS=['one', 'two'], TOKEN_STRATEGY='least_used',
+                     RATE_LIMIT_RESERVE=0, RATE_LIMIT_MAX_WAIT=0)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reset = int(time.time()) + 100
+
+    def report(self, token, remaining):
+        ratelimit.record(token, 200, {
+            'X-RateLimit-Limit': '5000', 'X-RateLimit-Remaining': str(remaining), 'X-RateLimit-Reset': str(self.reset),
+        })
+
+    def test_each_call_reserves_one_request(self):
+        self.report('one', 2)
+        self.report('two', 0)
+
+        self.assertEqual([ratelimit.acquire(), ratelimit.acquire()], ['one', 'one'])
+        with self.assertRaises(ratelimit.RateLimitExceeded) as raised:
+            ratelimit.acquire()
+        self.assertAlmostEqual(raised.exception.retry_after, 100, delta=5)
+        self.assertEqual(ratelimit.status()['remaining'], 0)
+
+    def test_reserve_is_left_untouched(self):
+        self.report('one', 3)
+        self.report('two', 0)
+
+        with mock.patch('projects.ratelimit.RATE_LIMIT_RESERVE', 2):
+            self.assertEqual(ratelimit.acquire(), 'one')
+            with self.assertRaises(ratelimit.RateLimitExceeded):
+                ratelimit.acquire()
+
+    def test_least_used_token_goes_first(self):
+        self.report('one', 10)
+        self.report('two', 20)
+        self.assertEqual(ratelimit.acquire(), 'two')
+
+        # GitHub hasn't reported on a token yet: treat it as unused
+        cache.clear()
+        self.report('one', 10)
+        self.assertEqual(ratelimit.acquire(), 'two')
+
+    def test_round_robin_rotates_tokens(self):
+        with mock.patch('projects.ratelimit.TOKEN_STRATEGY', 'round_robin'):
+            tokens = [ratelimit.acquire() for _ in range(4)]
+        self.assertEqual(tokens, ['two', 'one', 'two', 'one'])
+
+    @mock.patch('projects.github_client.get_session')
+    def test_rate_limited_call_fails_over_to_the_next_token(self, get_session):
+        get = get_session.return_value.get
+        get.side_effect = [github_response(429, **{'Retry-After': '30'}), github_response(200, {'name': 'a'})]
+
+        response = github_client.github_get('/repos/octo/a')
+
+        self.assertEqual(response.json(), {'name': 'a'})
+        used = [call.kwargs['headers']['Authorization'] for call in get.call_args_list]
+        self.assertEqual(used, ['token one', 'token two'])
+        self.assertEqual(ratelimit._budget('one', 'core')['remaining'], 0)
+
+    @mock.patch('projects.github_client.get_session')
+    def test_raises_once_every_token_is_refused(self, get_session):
+        get_session.return_value.get.return_value = github_response(
+            403, **{'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) + 50)},
+        )
+
+        with self.assertRaises(ratelimit.RateLimitExceeded) as raised:
+            github_client.github_get('/repos/octo/a')
+        self.assertEqual(get_session.return_value.get.call_count, 2)
+        self.assertAlmostEqual(raised.exception.retry_after, 50, delta=5)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'response-cache-tests'}})
+class ProjectResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        self.a = Project.objects.create(name='a', stars=1)
+        self.b = Project.objects.create(name='b', stars=2)
+
+    def get(self, url, **headers):
+        return self.client.get(url, secure=True, **headers)
+
+    def names(self):
+        return {row['name'] for row in self.get(reverse('project-list')).json()['results']}
+
+    def test_saving_one_project_keeps_other_projects_details(self):
+        detail_b = reverse('project-detail', args=[self.b.pk])
+        self.get(detail_b)
+        self.assertEqual(self.names(), {'a', 'b'})
+
+        # Changed behind the cache's back, so a cached response still says 'b'
+        Project.objects.filter(pk=self.b.pk).update(name='b2')
+        self.a.name = 'a2'
+        self.a.save()
+
+        self.assertEqual(self.get(detail_b).json()['name'], 'b')
+        self.assertEqual(self.get(reverse('project-detail', args=[self.a.pk])).json()['name'], 'a2')
+        self.assertEqual(self.names(), {'a2', 'b2'})
+
+    def test_if_none_match_gets_a_304(self):
+        for url in (reverse('project-list'), reverse('project-detail', args=[self.a.pk])):
+            etag = self.get(url)['ETag']
+
+            self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+            self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200, url)
+
+
+@mock.patch('projects.ratelimit.GITHUB_TOKENS', [None])
+@mock.patch('projects.github_client.get_session')
+class ConditionalFetchTests(TestCase):
+    def setUp(self):
+        caches[github_client.GITHUB_CACHE_ALIAS].clear()
+
+    def sent_headers(self, get_session):
+        return [call.kwargs['headers'] for call in get_session.return_value.get.call_args_list]
+
+    def test_unchanged_repo_is_served_from_the_cache(self, get_session):
+        payload = fake_repo('octo', 'a')
+        get_session.return_value.get.side_effect = [
+            github_response(200, payload, ETag='"v1"'), github_response(304),
+        ]
+
+        first = github_client.fetch_repo('octo', 'a')
+        second = github_client.fetch_repo('Octo', 'A')
+
+        self.assertEqual(self.sent_headers(get_session), [{}, {'If-None-Match': '"v1"'}])
+        self.assertNotIsInstance(first, github_client.CachedResponse)
+        self.assertIsInstance(second, github_client.CachedResponse)
+        self.assertEqual((second.status_code, second.json()), (200, payload))
+
+    def test_gone_repo_is_dropped_from_the_cache(self, get_session):
+        get_session.return_value.get.side_effect = [
+            github_response(200, fake_repo('octo', 'a'), ETag='"v1"'), github_response(404), github_response(404),
+        ]
+
+        for _ in range(3):
+            response = github_client.fetch_repo('octo', 'a')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.sent_headers(get_session), [{}, {'If-None-Match': '"v1"'}, {}])
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        self.existing = Project.objects.create(name='old', owner='octo', full_name='octo/old', stars=0)
+
+    def post(self, data):
+        return self.client.post(reverse('bulk-import-github-repos'), data, content_type='application/json', secure=True)
+
+    def statuses(self, response):
+        return {result['repo']: result['status'] for result in response.json()['results']}
+
+    @mock.patch('projects.github_graphql.use_graphql', return_value=False)
+    @mock.patch('projects.github_client.fetch_repo')
+    def test_rest_import_reports_each_repo(self, fetch_repo, use_graphql):
+        def fetch(owner, repo):
+            if repo == 'down':
+                raise requests.ConnectionError
+            if repo == 'gone':
+                return github_response(404)
+            return github_response(200, fake_repo(owner, repo))
+        fetch_repo.side_effect = fetch
+
+        response = self.post({'repos': ['octo/new', 'octo/old', 'octo/gone', 'octo/down', 'octo/new']})
+
+        body = response.json()
+        self.assertEqual((body['imported'], body['updated'], body['failed']), (1, 1, 2))
+        self.assertEqual(self.statuses(response), {
+            'octo/new': 'imported', 'octo/old': 'updated', 'octo/gone': 'failed', 'octo/down': 'failed',
+        })
+        self.assertEqual(fetch_repo.call_count, 4)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.stars, fake_repo('octo', 'old')['stargazers_count'])
+        self.assertTrue(Project.objects.filter(full_name='octo/new').exists())
+
+    @mock.patch('projects.github_graphql.use_graphql', return_value=True)
+    @mock.patch('projects.github_graphql.fetch_repos')
+    def test_graphql_import_fetches_one_batch(self, fetch_repos, use_graphql):
+        fetch_repos.return_value = {'octo/new': (200, fake_repo('octo', 'new')), 'octo/gone': (404, None)}
+
+        response = self.post({'repos': ['octo/new', 'octo/gone']})
+
+        fetch_repos.assert_called_once_with(['octo/new', 'octo/gone'])
+        self.assertEqual(self.statuses(response), {'octo/new': 'imported', 'octo/gone': 'failed'})
+        self.assertIn('not found', response.json()['results'][1]['error'])
+
+    @mock.patch('projects.github_graphql.use_graphql', return_value=True)
+    @mock.patch('projects.github_graphql.fetch_repos', side_effect=ratelimit.RateLimitExceeded(30))
+    def test_graphql_rate_limit_fails_every_repo(self, fetch_repos, use_graphql):
+        response = self.post({'repos': ['octo/new', 'octo/old']})
+
+        self.assertEqual(response.json()['failed'], 2)
+        self.assertEqual(Project.objects.count(), 1)
+
+    @mock.patch('projects.api_integration.BULK_IMPORT_MAX_REPOS', 2)
+    @mock.patch('projects.github_client.fetch_repo')
+    def test_rejects_invalid_requests(self, fetch_repo):
+        for data in ({}, {'repos': []}, {'repos': 'octo/a'}, {'repos': ['octo/a', 'octo/b', 'octo/c']}):
+            self.assertEqual(self.post(data).status_code, 400, data)
+
+        response = self.post({'repos': ['not a repo', 7]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['invalid'], ['not a repo', 7])
+        fetch_repo.assert_not_called()
+
+
+class StarHistoryTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        now = timezone.now()
+        self.steady = Project.objects.create(name='steady', stars=180)
+        self.new = Project.objects.create(name='new', stars=50)
+        self.idle = Project.objects.create(name='idle', stars=5)
+        for project, days_ago, stars in [
+            (self.steady, 10, 100), (self.steady, 3, 150), (self.steady, 0, 180),
+            (self.new, 2, 10), (self.new, 0, 50),
+            (self.idle, 30, 5),
+        ]:
+            StarSnapshot.objects.create(project=project, stars=stars, captured_at=now - timedelta(days=days_ago))
+
+    def get(self, url, **params):
+        return self.client.get(url, params, secure=True)
+
+    def test_trending_counts_from_the_last_snapshot_before_the_window(self):
+        response = self.get(reverse('project-trending'), days=7)
+
+        rows = [(row['name'], row['stars_before'], row['stars_after'], row['gained'])
+                for row in response.json()['results']]
+        # New projects count from their first snapshot; idle ones have none in the window
+        self.assertEqual(rows, [('steady', 100, 180, 80), ('new', 10, 50, 40)])
+
+    def test_trending_limit_and_validation(self):
+        self.assertEqual(len(self.get(reverse('project-trending'), limit=1).json()['results']), 1)
+        self.assertEqual(self.get(reverse('project-trending'), days='week').status_code, 400)
+
+    def test_history_lists_snapshots_in_the_window_oldest_first(self):
+        url = reverse('project-history', args=[self.steady.pk])
+
+        stars = [point['stars'] for point in self.get(url, days=7).json()['history']]
+        self.assertEqual(stars, [150, 180])
+        self.assertEqual(len(self.get(url).json()['history']), 3)
+        self.assertEqual(self.get(url, days='x').status_code, 400)
+
+
+class ImportProjectsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        Project.objects.create(name='old', owner='octo', full_name='octo/old', stars=1)
+
+    def import_file(self, name, content):
+        path = self.directory / name
+        path.write_text(content)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_projects', str(path), '--chunk-size=2', stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def stars(self):
+        return dict(Project.objects.values_list('full_name', 'stars'))
+
+    def test_csv(self):
+        stdout, stderr = self.import_file('projects.csv', (
+            'name,owner,full_name,language,stars\n'
+            'a,octo,octo/a,Go,10\n'
+            'old,octo,octo/old,,20\n'
+            ',octo,octo/b,Go,30\n'
+            'c,octo,octo/c,Go,many\n'
+        ))
+
+        self.assertEqual(self.stars(), {'octo/a': 10, 'octo/old': 20})
+        self.assertEqual(Project.objects.get(full_name='octo/a').language, 'Go')
+        self.assertIn('4 read, 2 upserted, 2 invalid', stdout)
+        self.assertEqual(stderr.splitlines(), [
+            'Record 4: name: This field is required.',
+            'Record 5: stars: A valid integer is required.',
+        ])
+
+    def test_ndjson(self):
+        lines = [
+            json.dumps(github_record('octo', 'a', stars=10)),
+            json.dumps(fake_repo('octo', 'old')),
+            '{not json',
+            json.dumps({'owner': 'octo', 'full_name': 'octo/b', 'stars': -1}),
+        ]
+        stdout, stderr = self.import_file('projects.ndjson', '\n'.join(lines))
+
+        self.assertEqual(self.stars(), {'octo/a': 10, 'octo/old': fake_repo('octo', 'old')['stargazers_count']})
+        self.assertIsNotNone(Project.objects.get(full_name='octo/old').last_synced_at)
+        self.assertIn('4 read, 2 upserted, 2 invalid', stdout)
+        self.assertEqual(stderr.splitlines(), [
+            'Record 3: line 3 is not valid JSON',
+            'Record 4: name: This field is required.; stars: Ensure this value is greater than or equal to 0.',
+        ])
+
+
+@mock.patch('projects.instrumentation.METRICS_ENABLED', True)
+class MetricsAccessTests(TestCase):
+    def get(self, address):
+        return self.client.get('/metrics', REMOTE_ADDR=address, secure=True)
+
+    @mock.patch('projects.instrumentation.METRICS_ALLOWED_IPS', [instrumentation.ipaddress.ip_network('10.0.0.0/8')])
+    def test_only_staff_and_allowed_addresses(self):
+        self.assertEqual(self.get('10.1.2.3').status_code, 200)
+        self.assertEqual(self.get('192.0.2.1').status_code, 403)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        self.assertEqual(self.get('192.0.2.1').status_code, 200)
+
+
+class PerformanceLogTests(TestCase):
+    def test_only_slow_requests_are_warnings(self):
+        with self.assertLogs('projects.performance', 'INFO') as logs:
+            self.client.get('/metrics', secure=True)
+            with mock.patch('projects.middleware.SLOW_REQUEST_MS', 0):
+                self.client.get('/metrics', secure=True)
+
+        self.assertEqual([record.levelname for record in logs.records], ['INFO', 'WARNING'])
+        self.assertEqual(json.loads(logs.records[1].getMessage())['path'], '/metrics')
@@ -1,16 +1,33 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectViewSet, dashboard_view
-from .api_integration import fetch_github_repo, save_github_repo, delete_project
+from .views import ProjectViewSet, dashboard_view, db_pool_stats
+from .export import export_projects
+from .api_integration import (
+    fetch_github_repo, save_github_repo, delete_project, bulk_import_github_repos, github_pool_stats,
+    fetch_github_repo_async, save_github_repo_async, github_webhook, queue_github_repo, job_status,
+    bulk_delete_projects, bulk_update_projects,
+)
 
 router = DefaultRouter()
 router.register(r'', ProjectViewSet, basename='project')
 
 urlpatterns = [
+    path('projects/export/', export_projects, name='project-export'),
+    # Ahead of the router, whose detail route would otherwise take these paths
+    path('projects/bulk-delete/', bulk_delete_projects, name='bulk-delete-projects'),
+    path('projects/bulk-update/', bulk_update_projects, name='bulk-update-projects'),
     path('projects/', include(router.urls)),
     path('projects/<int:project_id>/delete/', delete_project, name='delete-project'),
+    path('github/pool-stats/', github_pool_stats, name='github-pool-stats'),
+    path('db/pool-stats/', db_pool_stats, name='db-pool-stats'),
+    path('github/bulk-import/', bulk_import_github_repos, name='bulk-import-github-repos'),
+    path('github/webhook/', github_webhook, name='github-webhook'),
     path('github/<str:owner>/<str:repo>/', fetch_github_repo, name='github-repo'),
-    path('github/save/<str:owner>/<str:repo>/', save_github_repo, name='save-github-repo')
+    path('github/save/<str:owner>/<str:repo>/', save_github_repo, name='save-github-repo'),
+    path('github/queue/<str:owner>/<str:repo>/', queue_github_repo, name='queue-github-repo'),
+    path('github/async/<str:owner>/<str:repo>/', fetch_github_repo_async, name='github-repo-async'),
+    path('github/async/save/<str:owner>/<str:repo>/', save_github_repo_async, name='save-github-repo-async'),
+    path('jobs/<int:job_id>/', job_status, name='job-status'),
 ]
 
 
@@ -1,9 +1,20 @@
+from datetime import timedelta
 from django.shortcuts import render
+from django.utils import timezone
 from django.contrib.admin.views.decorators import staff_member_required
 from rest_framework import viewsets
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
-from .models import Project
-from .serializers import ProjectSerializer
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from .caching import cached_response, detail_cache_key, list_cache_key
+from .filters import filter_projects
+from .instrumentation import database_stats
+from .models import Project, StarSnapshot
+from .pagination import ProjectSearchPagination
+from .renderers import FastJSONRenderer
+from .serializers import ProjectSerializer, requested_fields
+from .stats import get_dashboard_stats, star_growth
 
 def home_view(request):
     """Render the home page"""
@@ -13,16 +24,113 @@ def home_view(request):
 def dashboard_view(request):
     return render(request, 'admin/dashboard.html')
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def db_pool_stats(request):
+    return Response(database_stats())
+
 class ProjectViewSet(viewsets.ModelViewSet):
     queryset = Project.objects.all().order_by('-created_at')
     serializer_class = ProjectSerializer
     permission_classes = [IsAdminUser]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.request.query_params.get('search'):
+            self._paginator = ProjectSearchPagination()
+        return super().paginator
     
     def get_queryset(self):
-        queryset = Project.objects.all().order_by('-created_at')
-        language = self.request.query_params.get('language')
-        
-        if language:
-            queryset = queryset.filter(language__icontains=language)
+        queryset = Project.objects.all().order_by('-created_at', '-id')
+        queryset = filter_projects(queryset, self.request.query_params)
+
+        fields = requested_fields(self.request)
+        if fields:
+            # Load only the requested columns, plus the cursor's ordering keys
+            model_fields = {field.name for field in Project._meta.concrete_fields}
+            queryset = queryset.only(*(set(fields) & model_fields | {'id', 'created_at'}))
             
         return queryset
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == 'list':
+            # list() hands raw values() rows to the renderer, see list_rows
+            renderers = [FastJSONRenderer() if type(r) is JSONRenderer else r for r in renderers]
+        return renderers
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, list_cache_key(request), lambda: self.list_rows(request))
+
+    def list_rows(self, request):
+        """
+        The list page read with values() instead of through ProjectSerializer.
+
+        Rows carry the serializer's fields (after ``?fields=``) in its order,
+        and FastJSONRenderer writes their values as the serializer would, so
+        responses are unchanged, only cheaper to build.
+        """
+        fields = list(self.get_serializer().fields)
+        # The cursor takes its position from the page's rows
+        extra = [name for name in ('id', 'created_at') if name not in fields]
+        rows = self.get_queryset().values(*fields, *extra)
+
+        page = self.paginate_queryset(rows)
+        if page is None:
+            page = list(rows)
+            response = Response(page)
+        else:
+            response = self.get_paginated_response(page)
+
+        localize = timezone.get_current_timezone_name() != 'UTC'
+        datetime_fields = [name for name in fields if name in ('created_at', 'last_synced_at')]
+        for row in page:
+            for name in extra:
+                del row[name]
+            if localize:
+                # The serializer renders datetimes in the current time zone
+                for name in datetime_fields:
+                    if row[name] is not None:
+                        row[name] = timezone.localtime(row[name])
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            detail_cache_key(request, kwargs['pk']),
+            lambda: super(ProjectViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        try:
+            top = min(max(int(request.query_params.get('top', 10)), 1), 100)
+            recent = min(max(int(request.query_params.get('recent', 10)), 1), 100)
+        except ValueError:
+            return Response({"error": "'top' and 'recent' must be integers"}, status=400)
+        return Response(get_dashboard_stats(top, recent))
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), 365)
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "'days' and 'limit' must be integers"}, status=400)
+        return Response({"days": days, "results": star_growth(days, limit)})
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 3650)
+        except ValueError:
+            return Response({"error": "'days' must be an integer"}, status=400)
+        project = self.get_object()
+        since = timezone.now() - timedelta(days=days)
+        snapshots = (
+            StarSnapshot.objects
+            .filter(project=project, captured_at__gte=since)
+            .order_by('captured_at')
+            .values('stars', 'captured_at')
+        )
+        return Response({"id": project.id, "name": project.name, "history": list(snapshots)})
@@ -0,0 +1,222 @@
+"""
+GitHub webhook deliveries, applied without calling the API back.
+
+Each delivery already carries the full repository object, so star, watch,
+push and repository events are mapped straight onto Project fields. A
+delivery is stored as a WebhookUpdate row before it is acknowledged; later
+deliveries for the same repository, received by any worker, replace that
+row. Every GITHUB_WEBHOOK_FLUSH_INTERVAL seconds the pending rows are
+written together: a burst of stars on one repo becomes a single row update,
+and one flush writes all pending repos in a handful of statements. Only
+projects that are already tracked are updated.
+
+A process flushes after storing a delivery and on exit, and ``run_worker``
+flushes during its housekeeping, so rows left by a worker that was killed
+are still applied.
+
+Webhook-updated projects get a fresh last_synced_at, so the refresh worker
+leaves them alone.
+"""
+import atexit
+import hashlib
+import hmac
+import logging
+import os
+import threading
+from collections import defaultdict
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from .caching import invalidate_project_caches
+from .models import Project, WebhookUpdate
+from .services import project_fields_from_github, record_star_snapshots
+
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+WEBHOOK_FLUSH_INTERVAL = float(os.getenv("GITHUB_WEBHOOK_FLUSH_INTERVAL", "5"))
+
+WEBHOOK_EVENTS = ("star", "watch", "push", "repository")
+# Repository actions that don't describe the repo as it now is
+IGNORED_REPOSITORY_ACTIONS = ("deleted",)
+
+logger = logging.getLogger(__name__)
+
+
+def verify_signature(body, signature):
+    """Check X-Hub-Signature-256 against GITHUB_WEBHOOK_SECRET."""
+    if not WEBHOOK_SECRET or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def previous_full_name(payload):
+    """The full_name a renamed or transferred repository was tracked under."""
+    repository = payload["repository"]
+    changes = payload.get("changes") or {}
+    if payload.get("action") == "renamed":
+        old_name = changes.get("repository", {}).get("name", {}).get("from")
+        if old_name:
+            return f"{repository['owner']['login']}/{old_name}"
+    if payload.get("action") == "transferred":
+        old_owner = changes.get("owner", {}).get("from", {})
+        login = (old_owner.get("user") or old_owner.get("organization") or {}).get("login")
+        if login:
+            return f"{login}/{repository['name']}"
+    return None
+
+
+def apply_updates(pending):
+    """Write pending field values, a dict of stored full_name -> fields."""
+    projects = Project.objects.filter(full_name__in=list(pending)).only("id", "full_name", "stars")
+    groups = defaultdict(list)
+    starred = []
+
+    for project in projects:
+        fields = pending[project.full_name]
+        stars = project.stars
+        for field, value in fields.items():
+            setattr(project, field, value)
+        groups[frozenset(fields)].append(project)
+        if project.stars != stars:
+            starred.append(project)
+
+    if not groups:
+        return 0
+    try:
+        with transaction.atomic():
+            # One UPDATE per distinct set of fields, usually just one
+            for fields, group in groups.items():
+                Project.objects.bulk_update(group, sorted(fields))
+            record_star_snapshots(starred)
+        return sum(len(group) for group in groups.values())
+    except IntegrityError:
+        pass
+
+    # A rename onto a full_name that another project already tracks: apply
+    # the rest row by row and drop only the conflicting updates
+    applied, rejected = [], []
+    for fields, group in groups.items():
+        for project in group:
+            try:
+                with transaction.atomic():
+                    Project.objects.filter(pk=project.pk).update(
+                        **{field: getattr(project, field) for field in fields}
+                    )
+            except IntegrityError:
+                rejected.append(project)
+            else:
+                applied.append(project)
+    record_star_snapshots([project for project in starred if project in applied])
+    logger.warning(
+        "Dropped webhook updates for %s: full_name conflict",
+        sorted(project.full_name for project in rejected),
+    )
+    return len(applied)
+
+
+def store(payload):
+    """Save a delivery as the pending update of its repository."""
+    fields = project_fields_from_github(payload["repository"])
+    # Set from received_at when the update is applied
+    del fields["last_synced_at"]
+    previous = previous_full_name(payload)
+    stored = previous or fields["full_name"]
+
+    with transaction.atomic():
+        # Events after a rename that is still pending find the old row too
+        renamed_from = (
+            WebhookUpdate.objects.filter(repo_full_name=stored).exclude(full_name=stored)
+            .values_list("full_name", flat=True).first()
+        )
+        WebhookUpdate.objects.bulk_create(
+            [WebhookUpdate(
+                full_name=renamed_from or stored,
+                repo_full_name=fields["full_name"],
+                fields=fields,
+                received_at=timezone.now(),
+            )],
+            update_conflicts=True,
+            unique_fields=["full_name"],
+            update_fields=["repo_full_name", "fields", "received_at"],
+        )
+
+
+def flush_pending():
+    """Apply and remove the pending updates; returns the number of projects updated."""
+    with transaction.atomic():
+        # Rows another process is flushing are left to it; a delivery for a
+        # row locked here waits, then inserts a new one once it is deleted
+        pending = list(WebhookUpdate.objects.select_for_update(skip_locked=True))
+        if not pending:
+            return 0
+        updated = apply_updates({
+            update.full_name: {**update.fields, "last_synced_at": update.received_at}
+            for update in pending
+        })
+        # Each row was applied, rejected over a full_name conflict, or is for
+        # an untracked repo; any other error rolls back and keeps them pending
+        WebhookUpdate.objects.filter(id__in=[update.id for update in pending]).delete()
+
+    if updated:
+        invalidate_project_caches()
+    return updated
+
+
+class WebhookBuffer:
+    """Schedules a flush of the pending updates after each stored delivery."""
+
+    def __init__(self, interval=WEBHOOK_FLUSH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, payload):
+        store(payload)
+
+        if self.interval > 0:
+            with self._lock:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.interval, self._flush_in_background)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return
+        # No interval: apply each delivery as it arrives
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return flush_pending()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to apply pending webhook updates")
+        finally:
+            # The timer thread's connections would otherwise stay open
+            connections.close_all()
+
+    def flush_at_exit(self):
+        # Only if this process has something scheduled; anything left stays
+        # stored for the next flush
+        if self._timer is not None:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to apply pending webhook updates")
+
+
+buffer = WebhookBuffer()
+atexit.register(buffer.flush_at_exit)
+
+
+def handle_event(event, payload):
+    """Queue a delivery; returns False for events that carry nothing to apply."""
+    if event not in WEBHOOK_EVENTS or "repository" not in payload:
+        return False
+    if event == "repository" and payload.get("action") in IGNORED_REPOSITORY_ACTIONS:
+        return False
+    buffer.add(payload)
+    return True
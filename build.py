@@ -20,6 +20,9 @@ def main():
     
     print("Building React app...")
     run_command("npm run build", cwd=frontend_dir)
+
+    print("Updating dashboard templates...")
+    run_command("python update_template.py", cwd=project_root)
     
     print("Running migrations...")
     run_command("python manage.py migrate", cwd=backend_dir)
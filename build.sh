@@ -11,6 +11,9 @@ npm install
 npm run build
 cd ../../../
 
+# Point the dashboard templates at the hashed bundle names
+python update_template.py
+
 # Collect static files
 cd backend
 python manage.py collectstatic --noinput
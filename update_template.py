@@ -1,47 +1,62 @@
-import os
 import re
+import sys
 from pathlib import Path
 
+# Included by admin/dashboard.html and the project change list. Until a build
+# writes these, the empty copies in projects/templates/admin/ are used instead.
+HEAD_TEMPLATE = "dashboard_assets_head.html"
+SCRIPTS_TEMPLATE = "dashboard_assets_scripts.html"
+
+
+def static(name):
+    # Vite's own content-hashed names, not collectstatic's copies: chunks import
+    # each other by these, so the hints must fetch the very same URLs
+    return f"{{% get_static_prefix %}}assets/{name}"
+
+
+def asset_names(content, pattern):
+    return re.findall(pattern + r'[^>]*?/assets/([^"\']+)', content)
+
+
+def render_partial(lines):
+    return "{% load static %}\n" + "".join(f"{line}\n" for line in lines)
+
+
+def render_head(entries, chunks, stylesheets):
+    # Start every download from <head>: the entry and the chunks it imports
+    # are fetched in parallel instead of one after another as imports resolve
+    head = [f'<link rel="preload" href="{static(css)}" as="style">' for css in stylesheets]
+    head += [f'<link rel="modulepreload" href="{static(js)}">' for js in entries + chunks]
+    head += [f'<link rel="stylesheet" href="{static(css)}">' for css in stylesheets]
+    return render_partial(head)
+
+
+def render_scripts(entries):
+    return render_partial(f'<script type="module" src="{static(js)}"></script>' for js in entries)
+
+
 def update_template():
     script_dir = Path(__file__).parent
-    
+
     dist_dir = script_dir / "backend" / "frontend" / "admin-dashboard" / "dist"
-    template_file = script_dir / "backend" / "templates" / "admin" / "dashboard.html"
-    
+    template_dir = script_dir / "backend" / "templates" / "admin"
+
     index_html = dist_dir / "index.html"
     if not index_html.exists():
-        print("Build files not found. Run 'npm run build' first.")
-        return
-    
+        sys.exit("Build files not found. Run 'npm run build' first.")
+
     content = index_html.read_text()
-    
-    js_match = re.search(r'/assets/(index-[^"]+\.js)', content)
-    css_match = re.search(r'/assets/(index-[^"]+\.css)', content)
-    
-    if not js_match or not css_match:
-        print("Could not find asset filenames in build")
-        return
-    
-    js_file = js_match.group(1)
-    css_file = css_match.group(1)
-    
-    template_content = f"""<!DOCTYPE html>
-        <html>
-        <head>
-            <title>Projects Dashboard</title>
-            {{% load static %}}
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <meta name="csrf-token" content="{{{{ csrf_token }}}}">
-            <link rel="stylesheet" href="{{% static 'assets/{css_file}' %}}">
-        </head>
-        <body>
-            <div id="root"></div>
-            <script type="module" src="{{% static 'assets/{js_file}' %}}"></script>
-        </body>
-        </html>"""
-    template_file.write_text(template_content)
-    print(f"Template updated with {js_file} and {css_file}")
+
+    entries = asset_names(content, r'<script[^>]*type="module"')
+    chunks = asset_names(content, r'<link[^>]*rel="modulepreload"')
+    stylesheets = asset_names(content, r'<link[^>]*rel="stylesheet"')
+
+    if not entries or not stylesheets:
+        sys.exit("Could not find asset filenames in build")
+
+    (template_dir / HEAD_TEMPLATE).write_text(render_head(entries, chunks, stylesheets))
+    (template_dir / SCRIPTS_TEMPLATE).write_text(render_scripts(entries))
+    print(f"Templates updated with {', '.join(entries + chunks + stylesheets)}")
 
 if __name__ == "__main__":
-    update_template()
\ No newline at end of file
+    update_template()